@@ -0,0 +1,41 @@
+# coding=utf-8
+# 导入耗时对比：默认模式 vs 懒加载模式（DRAWWITHPLT_LAZY=1）
+# 用法：python benchmarks/bench_import.py [重复次数]
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def ColdImport(lazy, repeat=10):
+    # 每次在新进程中导入，统计冷启动耗时（秒）
+    env = dict(os.environ, MPLBACKEND="Agg", PYTHONPATH=ROOT)
+    env["DRAWWITHPLT_LAZY"] = "1" if lazy else "0"
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, "-c", "import drawwithplt"], env=env)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2], times[0]
+
+
+def Baseline(repeat=10):
+    # 仅启动解释器的耗时，用于扣除
+    start = time.perf_counter()
+    for _ in range(repeat):
+        subprocess.check_call([sys.executable, "-c", "pass"])
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    base = Baseline(repeat)
+    eager_med, eager_min = ColdImport(False, repeat)
+    lazy_med, lazy_min = ColdImport(True, repeat)
+    print("interpreter startup : %.3f s" % base)
+    print("eager import        : median %.3f s, min %.3f s" % (eager_med, eager_min))
+    print("lazy import         : median %.3f s, min %.3f s" % (lazy_med, lazy_min))
+    print("speedup (net)       : %.2fx" % ((eager_med - base) / max(lazy_med - base, 1e-9)))
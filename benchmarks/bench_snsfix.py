@@ -0,0 +1,43 @@
+# coding=utf-8
+# snsFix 各后端绘制与保存耗时对比
+# 用法：python benchmarks/bench_snsfix.py [网格尺寸 ...]
+import os
+import sys
+import time
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import drawwithplt as D
+
+BACKENDS = ("sns", "image", "mesh")
+SIZES = (100, 500, 1000, 2000)
+DPI = 200
+
+
+def TimeBackend(backend, n):
+    # 返回 (绘制耗时, 保存耗时)，单位秒
+    x = np.linspace(0, 1, n)
+    y = np.linspace(0, 2, n)
+    z = np.sin(6*x)[:, None] * np.cos(4*y)[None, :]
+    fig = D.plt.figure(figsize=(6, 4))
+    start = time.perf_counter()
+    D.snsFix(x, y, z, xl={"step": max(1, n//5)}, yl={"step": max(1, n//5)}, zl={},
+             contour=True, backend=backend)
+    fig.canvas.draw()
+    draw = time.perf_counter() - start
+    start = time.perf_counter()
+    fig.savefig(os.devnull, format="png", dpi=DPI)
+    save = time.perf_counter() - start
+    D.plt.close(fig)
+    return draw, save
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or SIZES
+    print("%8s %8s %10s %10s" % ("size", "backend", "draw(s)", "save(s)"))
+    for n in sizes:
+        for backend in BACKENDS:
+            draw, save = TimeBackend(backend, n)
+            print("%8d %8s %10.3f %10.3f" % (n, backend, draw, save))
@@ -0,0 +1,224 @@
+# coding=utf-8
+# 绘图函数基准测试：按数据规模分别统计构建（调用绘图函数）、绘制（canvas.draw）、保存三个阶段的耗时及峰值内存
+# 用法：
+#   python benchmarks/bench_suite.py -o results.json                   运行并保存结果
+#   python benchmarks/bench_suite.py -b baseline.json                  与基线比较，变慢超过阈值时返回 1
+#   python benchmarks/bench_suite.py --cases snsFix,DrawMaps --quick   只跑部分用例、较小规模
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import matplotlib
+import drawwithplt as D
+
+PHASES = ("build", "draw", "save")
+
+
+def _Field(n, m=None):
+    m = n if m is None else m
+    x = np.linspace(0, 1, n)
+    y = np.linspace(0, 2, m)
+    return x, y, np.sin(6*x)[:, None]*np.cos(4*y)[None, :]
+
+
+def SetupSnsFix(n):
+    return _Field(n)
+
+
+def BuildSnsFix(fig, data):
+    x, y, z = data
+    step = max(1, len(x)//5)
+    D.snsFix(x, y, z, xl={"step": step}, yl={"step": step}, zl={}, contour=True)
+
+
+def SetupDrawMaps(n):
+    z = _Field(n)[2]
+    return {(i, j): z*(i+1)-j for i in range(2) for j in range(3)}
+
+
+def BuildDrawMaps(fig, data):
+    D.DrawMaps(range(2), range(3), data, {})
+
+
+def SetupPlot3DFix(n):
+    return _Field(n)
+
+
+def BuildPlot3DFix(fig, data):
+    x, y, z = data
+    D.Plot3DFix(fig, x, y, z, xl={}, yl={}, zl={}, contour=True)
+
+
+def SetupSpline(n):
+    x = np.linspace(0, 10, n)
+    return x, np.sin(x)+0.01*np.cos(37*x)
+
+
+def BuildSpline(fig, data):
+    D.spline(data[0], data[1])
+
+
+def BuildPolyfit(fig, data):
+    D.polyfit(data[0], data[1], order=5)
+
+
+def SetupZone(n):
+    x = np.arange(n, dtype=float)
+    rng = np.random.default_rng(0)
+    return x, [np.cumsum(rng.standard_normal(n)) for _ in range(5)]
+
+
+def BuildZone(fig, data):
+    x, y = data
+    ax = fig.add_subplot(111)
+    axins = ax.inset_axes((0.4, 0.1, 0.4, 0.3))
+    for yi in y:
+        ax.plot(x, yi)
+        axins.plot(x, yi)
+    n = len(x)
+    D.Zone_and_linked(ax, axins, n//3, n//3+max(2, n//50), x, y)
+
+
+def SetupSaveFig(n):
+    return np.random.default_rng(0).random((n, n))
+
+
+def BuildSaveFig(fig, data):
+    ax = fig.add_subplot(111)
+    ax.imshow(data)
+
+
+# 名称 -> (准备数据, 构建图片, 规模列表, 快速模式规模列表)
+CASES = {
+    "snsFix": (SetupSnsFix, BuildSnsFix, (50, 200, 500), (50,)),
+    "DrawMaps": (SetupDrawMaps, BuildDrawMaps, (100, 500, 1000), (100,)),
+    "Plot3DFix": (SetupPlot3DFix, BuildPlot3DFix, (20, 50, 100), (20,)),
+    "spline": (SetupSpline, BuildSpline, (10**3, 10**4, 10**5), (10**3,)),
+    "polyfit": (SetupSpline, BuildPolyfit, (10**3, 10**5, 10**6), (10**3,)),
+    "Zone_and_linked": (SetupZone, BuildZone, (10**3, 10**5, 10**6), (10**3,)),
+    "SaveFig": (SetupSaveFig, BuildSaveFig, (100, 500, 1000), (100,)),
+}
+
+
+def RunOnce(name, build, data, dpi, outdir, trace=False):
+    # 返回各阶段耗时（秒），trace 时额外返回峰值内存（MB）
+    if trace:
+        tracemalloc.start()
+    fig = D.plt.figure(figsize=(6, 4))
+    times = {}
+    t0 = time.perf_counter()
+    build(fig, data)
+    times["build"] = time.perf_counter() - t0
+    fig = D.plt.gcf()
+    t0 = time.perf_counter()
+    fig.canvas.draw()
+    times["draw"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    if name == "SaveFig":
+        D.SaveFig(1, "bench.png", outdir+os.sep)
+    else:
+        fig.savefig(io.BytesIO(), format="png", bbox_inches="tight", dpi=dpi)
+    times["save"] = time.perf_counter() - t0
+    D.plt.close("all")
+    if trace:
+        times["peak_mb"] = tracemalloc.get_traced_memory()[1]/2**20
+        tracemalloc.stop()
+    return times
+
+
+def RunCase(name, size, repeat, dpi, outdir):
+    setup, build, _, _ = CASES[name]
+    data = setup(size)
+    runs = [RunOnce(name, build, data, dpi, outdir) for _ in range(repeat)]
+    result = {"case": name, "size": size}
+    for phase in PHASES:
+        result[phase] = float(np.median([r[phase] for r in runs]))
+    result["total"] = sum(result[phase] for phase in PHASES)
+    result["peak_mb"] = RunOnce(name, build, data, dpi, outdir, trace=True)["peak_mb"]
+    return result
+
+
+def Compare(results, baseline, threshold=0.2, floor=0.01):
+    # 与基线逐项比较，返回变慢超过 threshold（且绝对差超过 floor 秒）的条目
+    base = {(r["case"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        b = base.get((r["case"], r["size"]))
+        if b is None:
+            continue
+        for phase in PHASES + ("total",):
+            if r[phase] > b[phase]*(1+threshold) and r[phase]-b[phase] > floor:
+                regressions.append((r["case"], r["size"], phase, b[phase], r[phase]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="drawwithplt benchmark suite")
+    parser.add_argument("--cases", default=",".join(CASES), help="逗号分隔的用例名")
+    parser.add_argument("--sizes", default=None, help="逗号分隔的规模，覆盖各用例默认值")
+    parser.add_argument("--quick", action="store_true", help="只跑最小规模")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dpi", type=int, default=100, help="保存阶段的 DPI（SaveFig 用例临时设置 DPI_SAVE）")
+    parser.add_argument("-o", "--output", default=None, help="结果 JSON 文件")
+    parser.add_argument("-b", "--baseline", default=None, help="基线 JSON 文件")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定变慢的相对阈值")
+    args = parser.parse_args(argv)
+
+    D.DPI_SAVE = args.dpi
+    results = []
+    print("%-16s %9s %9s %9s %9s %9s %9s" % ("case", "size", "build", "draw", "save", "total", "peak(MB)"))
+    with tempfile.TemporaryDirectory() as outdir:
+        for name in args.cases.split(","):
+            _, _, sizes, quick = CASES[name]
+            if args.sizes:
+                sizes = [int(n) for n in args.sizes.split(",")]
+            elif args.quick:
+                sizes = quick
+            for size in sizes:
+                r = RunCase(name, size, args.repeat, args.dpi, outdir)
+                results.append(r)
+                print("%-16s %9d %9.3f %9.3f %9.3f %9.3f %9.1f" % (
+                    name, size, r["build"], r["draw"], r["save"], r["total"], r["peak_mb"]))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "matplotlib": matplotlib.__version__,
+            "seaborn": D.sns.__version__,
+            "dpi": args.dpi,
+            "repeat": args.repeat,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = Compare(results, baseline, args.threshold)
+        for case, size, phase, old, new in regressions:
+            print("REGRESSION %s[%d] %s: %.3fs -> %.3fs (%+.0f%%)" % (
+                case, size, phase, old, new, (new/old-1)*100))
+        if regressions:
+            return 1
+        print("no regressions against %s" % args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
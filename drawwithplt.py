@@ -1,22 +1,75 @@
 from matplotlib.axes import Axes
 import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 import os
+import importlib
+import functools
+import hashlib
+import io
+import json
+import sys
+import time
+import pickle
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent import futures
 from matplotlib.patches import ConnectionPatch
+from matplotlib.collections import LineCollection
 import matplotlib.ticker as mtick
-from mpl_toolkits.mplot3d import Axes3D
-from PIL import Image
-import matplotlib.gridspec as gridspec
-
-import scipy.interpolate as spi
-from scipy.interpolate import splrep,splev
 
 from matplotlib import offsetbox, rcParams
-from matplotlib.colors import ListedColormap,LinearSegmentedColormap
+from matplotlib.colors import Colormap,ListedColormap,LinearSegmentedColormap
 
 # ---------------------------------------------------------------
 
+# 懒加载模式：设置环境变量 DRAWWITHPLT_LAZY=1 后，重依赖与色卡在首次使用时才加载，
+# 且首次通过 pyplot 绘图时也不自动应用默认样式（需要时手动调用 InitConfig）
+LAZY = os.environ.get("DRAWWITHPLT_LAZY", "0") not in ("", "0")
+
+
+class _LazyImport(object):
+    # 延迟导入的模块/对象代理，首次访问属性或调用时才真正导入
+    def __init__(self, module, attr=None):
+        self._module = module
+        self._attr = attr
+        self._obj = None
+
+    def _load(self):
+        if self._obj is None:
+            obj = importlib.import_module(self._module)
+            if self._attr is not None:
+                obj = getattr(obj, self._attr)
+            self._obj = obj
+        return self._obj
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self):
+        target = self._module if self._attr is None else "%s.%s" % (self._module, self._attr)
+        return "<lazy import of %s>" % target
+
+
+def _import(module, attr=None):
+    # 非懒加载模式下立即导入，保持原有行为
+    proxy = _LazyImport(module, attr)
+    return proxy if LAZY else proxy._load()
+
+
+sns = _import("seaborn")
+gridspec = _import("matplotlib.gridspec")
+Axes3D = _import("mpl_toolkits.mplot3d", "Axes3D")
+Image = _import("PIL.Image")
+spi = _import("scipy.interpolate")
+splrep = _import("scipy.interpolate", "splrep")
+splev = _import("scipy.interpolate", "splev")
+
 FONTSIZE = 14
 AXISSIZE = 14
 DPI_SAVE = 800
@@ -29,10 +82,301 @@ config = {
     "font.serif": ['SimSun'],
     # "font.serif": ['Microsoft YaHei'],
 }
-rcParams.update(config)
-plt.rcParams['xtick.direction'] = 'in'
-plt.rcParams['ytick.direction'] = 'in'
-plt.rcParams['axes.unicode_minus'] = False
+
+
+def DefaultStyle():
+    # 默认字体与刻度设置（rcParams 字典）
+    style = dict(config)
+    style['xtick.direction'] = 'in'
+    style['ytick.direction'] = 'in'
+    style['axes.unicode_minus'] = False
+    return style
+
+
+# 导入时不修改全局 rcParams：pyplot 绘图函数首次调用时才应用默认样式（见 _EnsureConfig），
+# 对象接口（NewFigure/RenderFigure）只在 FigureStyle 上下文中临时应用样式
+_STYLE_LOCK = threading.RLock()
+_STYLE_LOCAL = threading.local()
+_CONFIGURED = [False]
+
+
+def InitConfig():
+    # 将默认字体与刻度设置应用到全局 rcParams（直接使用 pyplot 绘图、未经本库函数时需手动调用）
+    with _STYLE_LOCK:
+        rcParams.update(DefaultStyle())
+        _CONFIGURED[0] = True
+
+
+def _EnsureConfig():
+    # pyplot 路径首次使用时应用一次默认样式；处于 FigureStyle 上下文中或懒加载模式下跳过
+    if _CONFIGURED[0] or LAZY or getattr(_STYLE_LOCAL, "depth", 0):
+        return
+    with _STYLE_LOCK:
+        if not _CONFIGURED[0]:
+            InitConfig()
+
+
+# 性能统计：设置环境变量 DRAWWITHPLT_PROFILE=1 或使用 with Profile(): 开启，
+# 记录各绘图函数分阶段耗时、图元与多边形数、数组规模和输出文件大小；
+# DRAWWITHPLT_PROFILE_OUT=路径 时在退出前写出统计（.trace.json 结尾写为 trace-event 格式）
+_PROFILE = {"enabled": os.environ.get("DRAWWITHPLT_PROFILE", "0") not in ("", "0"), "records": []}
+_PROFILE_LOCK = threading.Lock()
+_PROFILE_LOCAL = threading.local()
+
+
+class _NullPhase(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase(object):
+    # 记录当前绘图函数内一个阶段的耗时
+    def __init__(self, name, record):
+        self.name = name
+        self.record = record
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.record["phases"].append({"name": self.name, "start": self.start,
+                                      "time": time.perf_counter() - self.start})
+        return False
+
+
+def _CurrentRecord():
+    stack = getattr(_PROFILE_LOCAL, "stack", None)
+    return stack[-1] if stack else None
+
+
+def Phase(name):
+    # 在绘图函数内标记阶段：with Phase("contour"): ...；未开启统计时无开销
+    record = _CurrentRecord() if _PROFILE["enabled"] else None
+    return _NULL_PHASE if record is None else _Phase(name, record)
+
+
+def _Note(key, value):
+    # 为当前绘图函数的统计记录附加信息（如输出文件大小）
+    record = _CurrentRecord() if _PROFILE["enabled"] else None
+    if record is not None:
+        record[key] = value
+
+
+def _ArraySizes(bound):
+    sizes = {}
+    for name, value in bound.items():
+        if isinstance(value, np.ndarray) and value.size > 1:
+            sizes[name] = {"shape": list(value.shape), "nbytes": int(value.nbytes)}
+        elif isinstance(value, dict):
+            arrays = [v for v in value.values() if isinstance(v, np.ndarray)]
+            if arrays:
+                sizes[name] = {"count": len(arrays), "nbytes": int(sum(a.nbytes for a in arrays))}
+    return sizes
+
+
+def _FindFigure(values):
+    from matplotlib.figure import Figure
+    for value in values:
+        for item in (value if isinstance(value, tuple) else (value,)):
+            if isinstance(item, Figure):
+                return item
+            if isinstance(item, Axes):
+                return item.figure
+    return plt.gcf() if plt.get_fignums() else None
+
+
+def _CountArtists(fig):
+    # 统计图中图元数与多边形（网格单元/曲面片/路径）数
+    from matplotlib.collections import Collection, QuadMesh
+    artists = fig.findobj()
+    polygons = 0
+    for artist in artists:
+        if isinstance(artist, QuadMesh):
+            h, w = artist.get_coordinates().shape[:2]
+            polygons += (h-1)*(w-1)
+        elif isinstance(artist, Collection):
+            polygons += len(artist.get_paths())
+    return len(artists), polygons
+
+
+def _Profiled(func):
+    # 绘图函数统计装饰器：未开启时直接调用
+    import inspect
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _EnsureConfig()
+        if not _PROFILE["enabled"]:
+            return func(*args, **kwargs)
+        try:
+            bound = signature.bind_partial(*args, **kwargs).arguments
+        except TypeError:
+            bound = {}
+        record = {"helper": func.__name__, "thread": threading.get_ident(),
+                  "arrays": _ArraySizes(bound), "phases": []}
+        stack = _PROFILE_LOCAL.__dict__.setdefault("stack", [])
+        stack.append(record)
+        record["start"] = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            record["time"] = time.perf_counter() - record["start"]
+            stack.pop()
+            with _PROFILE_LOCK:
+                _PROFILE["records"].append(record)
+        fig = _FindFigure([result] + list(bound.values()))
+        if fig is not None:
+            record["artists"], record["polygons"] = _CountArtists(fig)
+        return result
+    return wrapper
+
+
+def EnableProfile(flag=True):
+    _PROFILE["enabled"] = flag
+
+
+def ResetStats():
+    with _PROFILE_LOCK:
+        del _PROFILE["records"][:]
+
+
+def GetRecords():
+    # 每次绘图函数调用的原始统计记录
+    with _PROFILE_LOCK:
+        return list(_PROFILE["records"])
+
+
+def GetStats(records=None):
+    # 按绘图函数汇总：调用次数、总耗时、各阶段耗时、图元/多边形数、数组与输出文件大小
+    records = GetRecords() if records is None else records
+    stats = {}
+    for r in records:
+        s = stats.setdefault(r["helper"], {"calls": 0, "time": 0.0, "phases": {}, "artists": 0,
+                                           "polygons": 0, "array_bytes": 0, "file_size": 0})
+        s["calls"] += 1
+        s["time"] += r["time"]
+        for phase in r["phases"]:
+            s["phases"][phase["name"]] = s["phases"].get(phase["name"], 0.0) + phase["time"]
+        s["artists"] += r.get("artists", 0)
+        s["polygons"] += r.get("polygons", 0)
+        s["array_bytes"] += sum(a["nbytes"] for a in r["arrays"].values())
+        s["file_size"] += r.get("file_size", 0)
+    for s in stats.values():
+        s["mean"] = s["time"]/s["calls"]
+    return stats
+
+
+def DumpStats(path, records=None, trace=None):
+    # 写出统计：默认为 {"summary", "records"} 的 JSON；trace=True（或文件名以 .trace.json 结尾）写为 trace-event 格式
+    records = GetRecords() if records is None else records
+    trace = path.endswith(".trace.json") if trace is None else trace
+    if trace:
+        pid = os.getpid()
+        events = []
+        for r in records:
+            args = {k: r[k] for k in ("arrays", "artists", "polygons", "file_size") if k in r}
+            events.append({"name": r["helper"], "ph": "X", "pid": pid, "tid": r["thread"],
+                           "ts": r["start"]*1e6, "dur": r["time"]*1e6, "args": args})
+            for phase in r["phases"]:
+                events.append({"name": phase["name"], "ph": "X", "pid": pid, "tid": r["thread"],
+                               "ts": phase["start"]*1e6, "dur": phase["time"]*1e6})
+        data = {"traceEvents": events, "displayTimeUnit": "ms"}
+    else:
+        data = {"summary": GetStats(records), "records": records}
+    with open(path, "w") as f:
+        json.dump(data, f, indent=1)
+    return path
+
+
+class Profile(object):
+    # 统计上下文：with Profile() as prof: ...; prof.Stats()
+    def __enter__(self):
+        self._prev = _PROFILE["enabled"]
+        with _PROFILE_LOCK:
+            self._first = len(_PROFILE["records"])
+        _PROFILE["enabled"] = True
+        self.records = []
+        return self
+
+    def __exit__(self, *exc):
+        _PROFILE["enabled"] = self._prev
+        with _PROFILE_LOCK:
+            self.records = _PROFILE["records"][self._first:]
+        return False
+
+    def Stats(self):
+        return GetStats(self.records)
+
+    def Dump(self, path, trace=None):
+        return DumpStats(path, self.records, trace)
+
+
+if os.environ.get("DRAWWITHPLT_PROFILE_OUT"):
+    import atexit
+    atexit.register(DumpStats, os.environ["DRAWWITHPLT_PROFILE_OUT"])
+
+
+# 线程安全的对象接口：图片不经过 pyplot，直接绑定 Agg 画布；各绘图函数传入显式的 ax/figure/fig 即可在线程中安全使用
+
+
+def NewFigure(figsize=None, dpi=None):
+    # 创建不注册到 pyplot 的图片（Agg 画布），不会影响当前图片，也无需 plt.close
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+class FigureStyle(object):
+    # 样式上下文：构建图片期间临时应用 rcParams（默认为 DefaultStyle），退出时恢复，不修改全局设置
+    # rcParams 为进程内共享状态，多个线程的样式上下文依次进入（构建与绘制串行），只有上下文外的保存可并行
+    def __init__(self, style=None):
+        self.style = DefaultStyle() if style is None else style
+
+    def __enter__(self):
+        import matplotlib
+        _STYLE_LOCK.acquire()
+        try:
+            self._ctx = matplotlib.rc_context(self.style)
+            self._ctx.__enter__()
+        except BaseException:
+            _STYLE_LOCK.release()
+            raise
+        _STYLE_LOCAL.depth = getattr(_STYLE_LOCAL, "depth", 0) + 1
+        return self
+
+    def __exit__(self, *exc):
+        _STYLE_LOCAL.depth -= 1
+        try:
+            self._ctx.__exit__(*exc)
+        finally:
+            _STYLE_LOCK.release()
+        return False
+
+
+def RenderFigure(build, path=None, figsize=None, dpi=None, style=None):
+    # 在新建的 Agg 图片上调用 build(fig) 构建（样式上下文内），然后绘制并保存到 path（dpi 默认为 DPI_SAVE）
+    # 返回图片；可在线程池中安全调用（构建与绘制按 FigureStyle 串行，见 README）
+    with FigureStyle(style):
+        fig = NewFigure(figsize)
+        build(fig)
+        # 在样式上下文内完成一次绘制，使刻度与文字按该样式生成
+        fig.canvas.draw()
+    if path is not None:
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+        fig.savefig(path, bbox_inches='tight', dpi=DPI_SAVE if dpi is None else dpi)
+    return fig
 
 
 # 提供修改默认参数的快捷接口
@@ -48,16 +392,261 @@ def UpdataConfig(config):
     rcParams.update(config)
 
 
-def SaveFig(flag, path, filepath="figure/"):
-    # 保存图片
+@_Profiled
+def SaveFig(flag, path, filepath="figure/", close=False, fig=None):
+    # 保存图片；fig 默认为当前图片；close=True 时保存后关闭（见 CloseFig）
     if flag:
         if not os.path.isdir(filepath):
             os.makedirs(filepath)
-        plt.savefig(filepath+path, bbox_inches='tight', dpi=DPI_SAVE)
+        with Phase("savefig"):
+            (plt if fig is None else fig).savefig(filepath+path, bbox_inches='tight', dpi=DPI_SAVE)
+        if _PROFILE["enabled"]:
+            _Note("file_size", os.path.getsize(filepath+path))
+        if close:
+            CloseFig(fig)
     else:
         pass
 
 
+# 异步保存：图片快照后交给后台线程/进程池渲染与写盘
+SAVE_WORKERS = 4
+SAVE_QUEUE = 16
+RASTER_FORMATS = ("png", "jpg", "jpeg", "tif", "tiff", "bmp")
+_SAVE_POOL = None
+_SAVE_SLOTS = None
+_SAVE_PENDING = set()
+_SAVE_LOCK = threading.Lock()
+
+
+def SetSavePool(workers=SAVE_WORKERS, queue=SAVE_QUEUE, kind="thread"):
+    # 配置后台保存池：workers 为并发数，queue 为最多排队的任务数（超出时阻塞调用方），kind 为 thread 或 process
+    global _SAVE_POOL, _SAVE_SLOTS
+    # 等待已提交的任务结束，但不收集：其路径与异常仍由之后的 WaitSaves 返回
+    with _SAVE_LOCK:
+        pending = list(_SAVE_PENDING)
+    futures.wait(pending)
+    if _SAVE_POOL is not None:
+        _SAVE_POOL.shutdown()
+    if kind == "thread":
+        _SAVE_POOL = futures.ThreadPoolExecutor(max_workers=workers)
+    elif kind == "process":
+        _SAVE_POOL = futures.ProcessPoolExecutor(max_workers=workers)
+    else:
+        raise ValueError("kind must be 'thread' or 'process', got %r" % (kind,))
+    _SAVE_SLOTS = threading.BoundedSemaphore(queue)
+    return _SAVE_POOL
+
+
+def _SnapshotFig(fig):
+    # 序列化图片作为快照；临时解除与 pyplot 的关联，避免反序列化时注册到 pyplot
+    manager = fig.canvas.manager
+    fig.canvas.manager = None
+    try:
+        return pickle.dumps(fig)
+    finally:
+        fig.canvas.manager = manager
+
+
+def _WriteFig(snapshot, targets, dpi):
+    # 后台任务：还原快照，只计算一次紧凑边界；光栅格式先渲染一次无损 RGBA 的 PNG 母版，再由母版转码
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = pickle.loads(snapshot)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    bbox = fig.get_tightbbox(canvas.get_renderer()).padded(rcParams["savefig.pad_inches"])
+
+    raster = [t for t in targets if t.rsplit(".", 1)[-1].lower() in RASTER_FORMATS]
+    vector = [t for t in targets if t not in raster]
+    if raster:
+        master = io.BytesIO()
+        fig.savefig(master, format="png", bbox_inches=bbox, dpi=dpi)
+        img = None
+        for target in raster:
+            ext = target.rsplit(".", 1)[-1].lower()
+            if ext == "png":
+                with open(target, "wb") as f:
+                    f.write(master.getvalue())
+                continue
+            if img is None:
+                master.seek(0)
+                img = Image.open(master)
+                img.load()
+            if ext in ("jpg", "jpeg", "bmp"):
+                # 无透明通道的格式：与 matplotlib 一致，合成到白色背景
+                flat = Image.new("RGB", img.size, (255, 255, 255))
+                flat.paste(img, mask=img.getchannel("A") if img.mode == "RGBA" else None)
+                flat.save(target, dpi=(dpi, dpi))
+            else:
+                img.save(target, dpi=(dpi, dpi))
+    for target in vector:
+        fig.savefig(target, bbox_inches=bbox, dpi=dpi)
+    return list(targets)
+
+
+def _SaveDone(future):
+    # 结束的任务（无论成败）保留在集合中，直到 WaitSaves 收集其路径或异常
+    _SAVE_SLOTS.release()
+
+
+def _SubmitSave(fig, targets):
+    if _SAVE_POOL is None:
+        SetSavePool()
+    fig = plt.gcf() if fig is None else fig
+    snapshot = _SnapshotFig(fig)
+    # 队列已满时阻塞，防止快照无限堆积
+    _SAVE_SLOTS.acquire()
+    try:
+        future = _SAVE_POOL.submit(_WriteFig, snapshot, targets, DPI_SAVE)
+    except BaseException:
+        _SAVE_SLOTS.release()
+        raise
+    with _SAVE_LOCK:
+        _SAVE_PENDING.add(future)
+    future.add_done_callback(_SaveDone)
+    return future
+
+
+@_Profiled
+def SaveFigAsync(flag, path, filepath="figure/", fig=None):
+    # 异步保存图片，立即返回 Future（结果为写出的文件路径列表）；fig 默认为当前图片
+    if not flag:
+        return None
+    if not os.path.isdir(filepath):
+        os.makedirs(filepath)
+    return _SubmitSave(fig, [filepath+path])
+
+
+@_Profiled
+def SaveFigs(flag, path, formats=("png", "pdf"), filepath="figure/", fig=None, wait=True):
+    # 一次快照输出多种格式，path 不含扩展名；wait=False 时返回 Future
+    if not flag:
+        return None
+    if not os.path.isdir(filepath):
+        os.makedirs(filepath)
+    future = _SubmitSave(fig, [filepath+path+"."+fmt.lstrip(".") for fmt in formats])
+    if not wait:
+        return future
+    with Phase("wait"):
+        paths = future.result()
+    if _PROFILE["enabled"]:
+        _Note("file_size", sum(os.path.getsize(p) for p in paths))
+    return paths
+
+
+def WaitSaves(timeout=None):
+    # 等待所有已提交的异步保存完成，返回上次调用以来写出的全部文件路径（包括已结束的任务）
+    # 任一任务失败时抛出其异常；每个任务只收集一次
+    with _SAVE_LOCK:
+        pending = list(_SAVE_PENDING)
+    done, not_done = futures.wait(pending, timeout=timeout)
+    # 已结束的任务只收集一次
+    with _SAVE_LOCK:
+        _SAVE_PENDING.difference_update(done)
+    if not_done:
+        raise futures.TimeoutError("%d figure saves still pending" % len(not_done))
+    paths = []
+    for future in done:
+        paths.extend(future.result())
+    return paths
+
+
+
+# 矢量导出时自动栅格化：元素数超过阈值的集合、曲线与大图像按 DPI 栅格化，文字、坐标轴与颜色条保持矢量
+RASTER_THRESHOLD = 5000
+VECTOR_FORMATS = ("pdf", "svg", "eps", "ps")
+
+
+def _ElementCount(artist):
+    # 图元包含的矢量元素数：网格单元、路径或顶点、折线点数、图像像素数
+    from matplotlib.collections import Collection, QuadMesh
+    from matplotlib.image import AxesImage
+    from matplotlib.lines import Line2D
+    if isinstance(artist, QuadMesh):
+        h, w = artist.get_coordinates().shape[:2]
+        return (h-1)*(w-1)
+    if isinstance(artist, Collection):
+        paths = artist.get_paths()
+        if len(paths) > RASTER_THRESHOLD:
+            return len(paths)
+        return max(len(paths), sum(len(p.vertices) for p in paths))
+    if isinstance(artist, Line2D):
+        return len(artist.get_xdata())
+    if isinstance(artist, AxesImage):
+        array = artist.get_array()
+        return 0 if array is None else int(np.prod(array.shape[:2]))
+    return 0
+
+
+def _IsColorbarAxes(ax):
+    return getattr(ax, "_colorbar", None) is not None or ax.get_label() == "<colorbar>"
+
+
+def RasterizeHeavy(fig=None, threshold=None):
+    # 将元素数超过 threshold 的图元设为栅格化（跳过颜色条），返回 [(图元, 元素数), ...]
+    fig = plt.gcf() if fig is None else fig
+    threshold = RASTER_THRESHOLD if threshold is None else threshold
+    # 三维图元（如 Plot3DFix 的曲面）在首次绘制投影前没有路径，先绘制一次才能计数
+    if any(ax.name == "3d" and any(len(c.get_paths()) == 0 for c in ax.collections) for ax in fig.axes):
+        fig.canvas.draw()
+    heavy = []
+    for ax in fig.axes:
+        if _IsColorbarAxes(ax):
+            continue
+        for artist in ax.get_children():
+            # 不支持栅格化的图元（如部分版本的 ContourSet）保持矢量
+            if not getattr(artist.draw, "_supports_rasterization", False):
+                continue
+            n = _ElementCount(artist)
+            if n > threshold and not artist.get_rasterized():
+                artist.set_rasterized(True)
+                heavy.append((artist, n))
+    return heavy
+
+
+@_Profiled
+def SaveFigVector(flag, path, filepath="figure/", fig=None, threshold=None, dpi=None, compare=False):
+    # 矢量格式保存：重图元按 dpi（默认 DPI_SAVE）栅格化，保存后恢复原设置
+    # 返回报告字典：栅格化图元数、元素数、文件大小与耗时；compare=True 时另存纯矢量版本对比大小与耗时
+    if not flag:
+        return None
+    if not os.path.isdir(filepath):
+        os.makedirs(filepath)
+    fig = plt.gcf() if fig is None else fig
+    dpi = DPI_SAVE if dpi is None else dpi
+    target = filepath+path
+    report = {}
+    if compare:
+        import tempfile
+        fd, tmp = tempfile.mkstemp(suffix=os.path.splitext(path)[1])
+        os.close(fd)
+        try:
+            start = time.perf_counter()
+            with Phase("savefig_vector"):
+                fig.savefig(tmp, bbox_inches='tight', dpi=dpi)
+            report["vector_time"] = time.perf_counter() - start
+            report["vector_size"] = os.path.getsize(tmp)
+        finally:
+            os.remove(tmp)
+    heavy = RasterizeHeavy(fig, threshold)
+    try:
+        start = time.perf_counter()
+        with Phase("savefig"):
+            fig.savefig(target, bbox_inches='tight', dpi=dpi)
+        report["time"] = time.perf_counter() - start
+    finally:
+        for artist, _ in heavy:
+            artist.set_rasterized(False)
+    report["size"] = os.path.getsize(target)
+    report["rasterized"] = len(heavy)
+    report["elements"] = int(sum(n for _, n in heavy))
+    if compare:
+        report["size_ratio"] = report["size"]/max(report["vector_size"], 1)
+        report["time_ratio"] = report["time"]/max(report["vector_time"], 1e-9)
+    _Note("file_size", report["size"])
+    return report
+
+
+@_Profiled
 def TestColorList(clist):
     # 显示色卡
     num = len(clist)
@@ -94,23 +683,232 @@ def TestColorList(clist):
     plt.show()
 
 
-def SetColor(string, array):
-    # 用户应用现有颜色，如“tab10”
-    color_list = plt.cm.get_cmap(string)(array)
-    TestColorList(color_list)
+# 色卡登记表：名称 -> (颜色元组, 默认分级数 N)，色图与采样结果按需构建并缓存
+_PALETTES = {}
+PALETTE_CACHE_SIZE = 128
+
+
+def RegisterPalette(name, colors, N=256):
+    # 登记自定义色卡，之后 GetColormap/GetColors/SetColor 可按名称取用
+    _PALETTES[name] = (tuple(colors), N)
+    GetColormap.cache_clear()
+    _SampleColors.cache_clear()
+
+
+def _PaletteKey(palette):
+    # 名称原样返回，颜色列表转为可哈希的元组
+    if isinstance(palette, str):
+        return palette
+    return tuple(c if isinstance(c, str) else tuple(np.ravel(c).tolist()) for c in palette)
+
+
+@functools.lru_cache(maxsize=PALETTE_CACHE_SIZE)
+def _Colormap(key, N):
+    if isinstance(key, str) and key in _PALETTES:
+        colors, default_N = _PALETTES[key]
+        return LinearSegmentedColormap.from_list(key, colors, default_N if N is None else N)
+    if isinstance(key, str):
+        return plt.get_cmap(key, N)
+    return LinearSegmentedColormap.from_list("mylist", key, 256 if N is None else N)
+
+
+def GetColormap(palette, N=None):
+    # 取色图（带 LRU 缓存）：palette 为登记的色卡名、matplotlib 色图名或颜色列表；返回共享对象，修改前请 copy()
+    # palette 为 Colormap 对象时原样返回（给定 N 时重采样），不缓存
+    if isinstance(palette, Colormap):
+        if N is None:
+            return palette
+        # matplotlib<3.6 只有 _resample
+        return (palette.resampled if hasattr(palette, "resampled") else palette._resample)(N)
+    return _Colormap(_PaletteKey(palette), N)
+
+
+GetColormap.cache_clear = _Colormap.cache_clear
+
+
+@functools.lru_cache(maxsize=PALETTE_CACHE_SIZE)
+def _SampleColors(key, N, samples):
+    if isinstance(samples, int):
+        samples = np.linspace(0, 1, samples)
+    return _Colormap(key, N)(np.asarray(samples))
+
+
+def GetColors(palette, samples=5, N=None):
+    # 无界面取色（带 LRU 缓存）：samples 为采样个数或采样位置（整数数组按下标取色，同 Colormap）
+    if not isinstance(samples, (int, np.integer)):
+        samples = tuple(np.ravel(samples).tolist())
+    else:
+        samples = int(samples)
+    if isinstance(palette, Colormap):
+        positions = np.linspace(0, 1, samples) if isinstance(samples, int) else np.asarray(samples)
+        return GetColormap(palette, N)(positions)
+    return _SampleColors(_PaletteKey(palette), N, samples).copy()
+
+
+def PreviewPalette(palette, samples=5, N=None):
+    # 需要时再绘制色卡预览
+    colors = GetColors(palette, samples, N)
+    TestColorList(colors)
+    return colors
+
+
+def SetColor(string, array, show=True):
+    # 用户应用现有颜色，如“tab10”；show=False 时不绘制色卡预览
+    # array 原样传给色图：整数为下标，浮点为 0~1 位置（与 GetColors 的整数表示采样个数不同）
+    color_list = GetColormap(string)(array)
+    if show:
+        TestColorList(color_list)
     return color_list
 
 
 def SetColorSelf(colorlist,N,NS=5):
     # 用户自定义简便颜色，并提供渐变分级
-    newcmp = LinearSegmentedColormap.from_list("mylist",colorlist,N)
-    colorlist = plt.cm.get_cmap(newcmp)(np.linspace(0,1,NS))
+    newcmp = GetColormap(colorlist, N)
+    colorlist = GetColors(colorlist, NS, N)
     return newcmp,colorlist
 
 
+# 图片生命周期：在 ManagedFigures 上下文中创建的图片退出时关闭，或清空后放回 FigurePool 供同尺寸图片复用
+# 所有存活的图片池（弱引用），供 FigureStats 统计
+_POOLS = weakref.WeakSet()
+
+
+class FigurePool(object):
+    # 图片池：按 (宽, 高, dpi) 缓存已清空的图片，复用其画布；每种尺寸最多保留 maxsize 个，超出的直接关闭
+    def __init__(self, maxsize=4):
+        self.maxsize = maxsize
+        self.free = {}
+        _POOLS.add(self)
+
+    @staticmethod
+    def _Key(figsize, dpi):
+        figsize = rcParams["figure.figsize"] if figsize is None else figsize
+        dpi = rcParams["figure.dpi"] if dpi is None else dpi
+        return (round(float(figsize[0]), 4), round(float(figsize[1]), 4), float(dpi))
+
+    @staticmethod
+    def _Reset(fig):
+        # 清空图片并恢复默认子图间距
+        fig.clf()
+        fig.subplots_adjust(**{k: rcParams["figure.subplot."+k]
+                               for k in ("left", "right", "bottom", "top", "wspace", "hspace")})
+
+    def Acquire(self, figsize=None, dpi=None):
+        # 取同尺寸的空闲图片并设为当前图片，没有时新建
+        # 放回后的图片仍可能是 pyplot 的当前图片，期间被其他 plt 调用画上的内容在取出时再清空一次
+        free = self.free.get(self._Key(figsize, dpi), [])
+        while free:
+            fig = free.pop()
+            if plt.fignum_exists(fig.number):
+                self._Reset(fig)
+                plt.figure(fig.number)
+                return fig
+        return plt.figure(figsize=figsize, dpi=dpi)
+
+    def Release(self, fig):
+        # 清空图片并放回池中
+        if not plt.fignum_exists(fig.number):
+            return
+        free = self.free.setdefault(self._Key(fig.get_size_inches(), fig.dpi), [])
+        if fig in free:
+            return
+        if len(free) >= self.maxsize:
+            plt.close(fig)
+            return
+        self._Reset(fig)
+        free.append(fig)
+
+    def Count(self):
+        return sum(len(free) for free in self.free.values())
+
+    def Clear(self):
+        for free in self.free.values():
+            for fig in free:
+                plt.close(fig)
+        self.free.clear()
+
+
+_MANAGED = []
+
+
+class ManagedFigures(object):
+    # with ManagedFigures(pool): 期间新建的图片在退出时关闭；给定 pool 时改为清空后放回池中，并优先从池中取图片
+    def __init__(self, pool=None):
+        self.pool = pool
+
+    def __enter__(self):
+        self._before = set(plt.get_fignums())
+        self.acquired = []
+        _MANAGED.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _MANAGED.remove(self)
+        from matplotlib import _pylab_helpers
+        figs = {m.num: m.canvas.figure for m in _pylab_helpers.Gcf.get_all_fig_managers()
+                if m.num not in self._before}
+        figs.update((f.number, f) for f in self.acquired if plt.fignum_exists(f.number))
+        for num in sorted(figs):
+            fig = figs[num]
+            if self.pool is not None:
+                self.pool.Release(fig)
+            else:
+                plt.close(fig)
+        return False
+
+
+def _NewFigure(figsize=None):
+    # 各绘图函数统一由此新建图片，处于带图片池的 ManagedFigures 中时复用池中图片
+    _EnsureConfig()
+    if not _MANAGED:
+        return plt.figure(figsize=figsize)
+    ctx = _MANAGED[-1]
+    fig = plt.figure(figsize=figsize) if ctx.pool is None else ctx.pool.Acquire(figsize)
+    ctx.acquired.append(fig)
+    return fig
+
+
+def CloseFig(fig=None):
+    # 关闭图片（默认当前图片）；处于带图片池的 ManagedFigures 中时清空后放回池中
+    fig = plt.gcf() if fig is None else fig
+    pool = _MANAGED[-1].pool if _MANAGED else None
+    if pool is None:
+        plt.close(fig)
+    else:
+        pool.Release(fig)
+
+
+def _CurrentRSS():
+    # 当前进程常驻内存（字节），无法获取时返回 None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1])*os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def FigureStats(pool=None):
+    # 存活图片数、池中空闲图片数（默认统计所有存活的图片池，给定 pool 时只统计该池）、使用中的图片数、
+    # 画布像素缓冲估计（字节）及进程常驻内存
+    from matplotlib import _pylab_helpers
+    figs = [m.canvas.figure for m in _pylab_helpers.Gcf.get_all_fig_managers()]
+    live = set(id(f) for f in figs)
+    pooled = set()
+    for p in (list(_POOLS) if pool is None else [pool]):
+        pooled.update(id(f) for free in p.free.values() for f in free if id(f) in live)
+    return {
+        "live": len(figs),
+        "pooled": len(pooled),
+        "in_use": len(live - pooled),
+        "canvas_bytes": int(sum(f.bbox.width*f.bbox.height*4 for f in figs)),
+        "rss": _CurrentRSS(),
+    }
+
+
 def SetSubFig(xnum, ynum, size):
     # 规范子图（各图大小一致）
-    fig, ax = plt.subplots(xnum, ynum, figsize=size)
+    fig = _NewFigure(size)
+    ax = fig.subplots(xnum, ynum)
     if xnum+ynum > 2:
         axes = ax.flatten()
         return fig, axes
@@ -119,13 +917,78 @@ def SetSubFig(xnum, ynum, size):
 
 def SetSubFig_GS(xnum, ynum, size):
     # 返回子图网格，自由度更高，使用需要plt.subplot
-    plt.figure(figsize=size)
+    _NewFigure(size)
     gs = gridspec.GridSpec(xnum, ynum)
     return gs
 
 
+class RangeIndex(object):
+    # 多序列区间最值索引：逐点合并为上下包络，按块汇总后建稀疏表，每次查询约为常数时间
+    def __init__(self, y, block=64):
+        if isinstance(y, np.ndarray) and y.ndim == 1:
+            y = [y]
+        series = [np.asarray(yi, dtype=float) for yi in y]
+        n = max(len(yi) for yi in series)
+        self.lo = np.full(n, np.inf)
+        self.hi = np.full(n, -np.inf)
+        for yi in series:
+            np.minimum(self.lo[:len(yi)], yi, out=self.lo[:len(yi)])
+            np.maximum(self.hi[:len(yi)], yi, out=self.hi[:len(yi)])
+        self.n = n
+        self.block = block
+        nb = -(-n // block)
+        pad = nb*block - n
+        self.tmin = [np.pad(self.lo, (0, pad), constant_values=np.inf).reshape(nb, block).min(axis=1)]
+        self.tmax = [np.pad(self.hi, (0, pad), constant_values=-np.inf).reshape(nb, block).max(axis=1)]
+        half = 1
+        while 2*half <= nb:
+            self.tmin.append(np.minimum(self.tmin[-1][:-half], self.tmin[-1][half:]))
+            self.tmax.append(np.maximum(self.tmax[-1][:-half], self.tmax[-1][half:]))
+            half *= 2
+
+    def Query(self, left, right):
+        # 返回下标 [left, right) 内所有序列的 (最小值, 最大值)
+        left, right = max(0, int(left)), min(self.n, int(right))
+        if right <= left:
+            raise ValueError("empty range [%d, %d)" % (left, right))
+        B = self.block
+        bl, br = -(-left // B), right // B
+        if bl >= br:
+            return np.min(self.lo[left:right]), np.max(self.hi[left:right])
+        k = (br-bl).bit_length() - 1
+        ymin = min(self.tmin[k][bl], self.tmin[k][br-2**k])
+        ymax = max(self.tmax[k][bl], self.tmax[k][br-2**k])
+        for part in (slice(left, bl*B), slice(br*B, right)):
+            if part.stop > part.start:
+                ymin = min(ymin, np.min(self.lo[part]))
+                ymax = max(ymax, np.max(self.hi[part]))
+        return ymin, ymax
+
+
+def _LinkedPoints(linked, xlim_left, xlim_right, ylim_bottom, ylim_top):
+    # 内嵌图与主图框线之间两条连线的端点
+    if linked == 'bottom':
+        return ((xlim_left, ylim_top), (xlim_left, ylim_bottom),
+                (xlim_right, ylim_top), (xlim_right, ylim_bottom))
+    elif linked == 'top':
+        return ((xlim_left, ylim_bottom), (xlim_left, ylim_top),
+                (xlim_right, ylim_bottom), (xlim_right, ylim_top))
+    elif linked == 'left':
+        return ((xlim_right, ylim_top), (xlim_left, ylim_top),
+                (xlim_right, ylim_bottom), (xlim_left, ylim_bottom))
+    elif linked == 'right':
+        return ((xlim_left, ylim_top), (xlim_right, ylim_top),
+                (xlim_left, ylim_bottom), (xlim_right, ylim_bottom))
+    raise ValueError("linked must be one of 'bottom', 'top', 'left', 'right', got %r" % (linked,))
+
+
+def _PadRange(ymin, ymax, y_ratio):
+    return ymin-(ymax-ymin)*y_ratio, ymax+(ymax-ymin)*y_ratio
+
+
+@_Profiled
 def Zone_and_linked(ax, axins, zone_left, zone_right, x, y, linked='bottom',
-                    x_ratio=0.05, y_ratio=0.05):
+                    x_ratio=0.05, y_ratio=0.05, index=None, interactive=False):
     """缩放内嵌图形，并且进行连线
     ax:         调用plt.subplots返回的画布。例如： fig,ax = plt.subplots(1,1)
     axins:      内嵌图的画布。 例如 axins = ax.inset_axes((0.4,0.1,0.4,0.3))
@@ -136,13 +999,22 @@ def Zone_and_linked(ax, axins, zone_left, zone_right, x, y, linked='bottom',
     linked:     进行连线的位置，{'bottom','top','left','right'}
     x_ratio:    X轴缩放比例
     y_ratio:    Y轴缩放比例
+    index:      RangeIndex(y)，多次放大同一组数据时复用，避免每次拼接切片
+    interactive:为真时返回 ZoomInset，内嵌图平移/缩放时自动更新 y 范围、框线与连线
     """
+    if interactive:
+        return ZoomInset(ax, axins, zone_left, zone_right, x, y, linked,
+                         x_ratio, y_ratio, index)
+
     xlim_left = x[zone_left]-(x[zone_right]-x[zone_left])*x_ratio
     xlim_right = x[zone_right]+(x[zone_right]-x[zone_left])*x_ratio
 
-    y_data = np.hstack([yi[zone_left:zone_right] for yi in y])
-    ylim_bottom = np.min(y_data)-(np.max(y_data)-np.min(y_data))*y_ratio
-    ylim_top = np.max(y_data)+(np.max(y_data)-np.min(y_data))*y_ratio
+    if index is None:
+        y_data = np.hstack([yi[zone_left:zone_right] for yi in y])
+        ymin, ymax = np.min(y_data), np.max(y_data)
+    else:
+        ymin, ymax = index.Query(zone_left, zone_right)
+    ylim_bottom, ylim_top = _PadRange(ymin, ymax, y_ratio)
 
     axins.set_xlim(xlim_left, xlim_right)
     axins.set_ylim(ylim_bottom, ylim_top)
@@ -150,18 +1022,8 @@ def Zone_and_linked(ax, axins, zone_left, zone_right, x, y, linked='bottom',
     ax.plot([xlim_left, xlim_right, xlim_right, xlim_left, xlim_left],
             [ylim_bottom, ylim_bottom, ylim_top, ylim_top, ylim_bottom], "black")
 
-    if linked == 'bottom':
-        xyA_1, xyB_1 = (xlim_left, ylim_top), (xlim_left, ylim_bottom)
-        xyA_2, xyB_2 = (xlim_right, ylim_top), (xlim_right, ylim_bottom)
-    elif linked == 'top':
-        xyA_1, xyB_1 = (xlim_left, ylim_bottom), (xlim_left, ylim_top)
-        xyA_2, xyB_2 = (xlim_right, ylim_bottom), (xlim_right, ylim_top)
-    elif linked == 'left':
-        xyA_1, xyB_1 = (xlim_right, ylim_top), (xlim_left, ylim_top)
-        xyA_2, xyB_2 = (xlim_right, ylim_bottom), (xlim_left, ylim_bottom)
-    elif linked == 'right':
-        xyA_1, xyB_1 = (xlim_left, ylim_top), (xlim_right, ylim_top)
-        xyA_2, xyB_2 = (xlim_left, ylim_bottom), (xlim_right, ylim_bottom)
+    xyA_1, xyB_1, xyA_2, xyB_2 = _LinkedPoints(linked, xlim_left, xlim_right,
+                                               ylim_bottom, ylim_top)
 
     con = ConnectionPatch(xyA=xyA_1, xyB=xyB_1, coordsA="data",
                           coordsB="data", axesA=axins, axesB=ax)
@@ -171,6 +1033,48 @@ def Zone_and_linked(ax, axins, zone_left, zone_right, x, y, linked='bottom',
     axins.add_artist(con)
 
 
+class ZoomInset(object):
+    # 可交互的放大内嵌图：内嵌图 x 范围变化（平移/缩放）时，用 RangeIndex 查询新的 y 范围并更新框线与连线
+    def __init__(self, ax, axins, zone_left, zone_right, x, y, linked='bottom',
+                 x_ratio=0.05, y_ratio=0.05, index=None):
+        self.ax = ax
+        self.axins = axins
+        self.x = np.asarray(x)
+        self.linked = linked
+        self.y_ratio = y_ratio
+        self.index = RangeIndex(y) if index is None else index
+        self.box, = ax.plot([], [], "black")
+        self.cons = []
+        for _ in range(2):
+            con = ConnectionPatch(xyA=(0, 0), xyB=(0, 0), coordsA="data",
+                                  coordsB="data", axesA=axins, axesB=ax)
+            axins.add_artist(con)
+            self.cons.append(con)
+        self._cid = axins.callbacks.connect("xlim_changed", self._OnXlim)
+        width = self.x[zone_right]-self.x[zone_left]
+        axins.set_xlim(self.x[zone_left]-width*x_ratio, self.x[zone_right]+width*x_ratio)
+
+    def _OnXlim(self, axins):
+        xlim_left, xlim_right = sorted(axins.get_xlim())
+        left = np.searchsorted(self.x, xlim_left, side="left")
+        right = np.searchsorted(self.x, xlim_right, side="right")
+        if right <= left:
+            return
+        ylim_bottom, ylim_top = _PadRange(*self.index.Query(left, right), self.y_ratio)
+        if ylim_top > ylim_bottom:
+            axins.set_ylim(ylim_bottom, ylim_top)
+        self.box.set_data([xlim_left, xlim_right, xlim_right, xlim_left, xlim_left],
+                          [ylim_bottom, ylim_bottom, ylim_top, ylim_top, ylim_bottom])
+        points = _LinkedPoints(self.linked, xlim_left, xlim_right, ylim_bottom, ylim_top)
+        for con, (xyA, xyB) in zip(self.cons, (points[:2], points[2:])):
+            con.xy1, con.xy2 = xyA, xyB
+            con.stale = True
+        axins.figure.canvas.draw_idle()
+
+    def Disconnect(self):
+        self.axins.callbacks.disconnect(self._cid)
+
+
 def initDict(xlist, ylist, z, xl, yl, zl):
     xl.setdefault("name", "x")
     xl.setdefault("step", 5)
@@ -197,99 +1101,205 @@ def initDict(xlist, ylist, z, xl, yl, zl):
     return xl, yl, zl
 
 
-def snsFix(xlist: np.array, ylist: np.array, z: np.array, xl={}, yl={}, zl={}, normalZero=True, contour=False, contournum=5, contourstyle='--', contourcolor="w", contourfmt='%.1f', ax=False, cbar=True, mask=np.array([])):
+@_Profiled
+def snsFix(xlist: np.array, ylist: np.array, z: np.array, xl={}, yl={}, zl={}, normalZero=True, contour=False, contournum=5, contourstyle='--', contourcolor="w", contourfmt='%.1f', ax=False, cbar=True, mask=np.array([]), backend="sns"):
     # normalZero:是否反转x轴数据以使得左下角为零点
+    # backend：sns 使用 seaborn 热力图；image 使用单个 imshow 图像，mesh 使用单个 pcolormesh，适合大网格
     # xl、yl中包含：name：标签名，step：采样步长，start：采样开始点，end：采样结束点，angle：标签旋转角度；zl中包含：name：标签名，color：字符串，cmap类型，min：最小值，max：最大值；
     if normalZero:
         z = z[::-1, :]
         xlist = xlist[::-1]
 
     if mask.shape[0] == 0:
-        mask = np.zeros_like(z,dtype=np.bool)
+        mask = np.zeros_like(z,dtype=bool)
 
     xl, yl, zl = initDict(xlist, ylist, z, xl, yl, zl)
 
-    if ax:
-        ax = sns.heatmap(z, vmax=zl["max"], vmin=zl["min"] , cmap=zl["color"],
-                     ax = ax, cbar=False, mask=mask)
-    else:
-        ax = sns.heatmap(z, vmax=zl["max"], vmin=zl["min"] , cmap=zl["color"],
-                     cbar=False, mask=mask)
+    with Phase("heatmap"):
+        if backend == "sns":
+            if ax:
+                ax = sns.heatmap(z, vmax=zl["max"], vmin=zl["min"] , cmap=zl["color"],
+                             ax = ax, cbar=False, mask=mask)
+            else:
+                ax = sns.heatmap(z, vmax=zl["max"], vmin=zl["min"] , cmap=zl["color"],
+                             cbar=False, mask=mask)
+            mappable = ax.collections[0]
+        else:
+            ax = ax if ax else plt.gca()
+            mappable = _FastHeatmap(ax, z, mask, zl, backend)
 
     # 绘制颜色条
     if cbar:
-        cbar = ax.figure.colorbar(ax.collections[0])
-        cbar.set_label(zl["name"])
+        with Phase("colorbar"):
+            cbar = ax.figure.colorbar(mappable)
+            cbar.set_label(zl["name"])
 
     # 是否绘制等高线
     if contour:
-        X, Y = np.meshgrid(range(ylist.shape[0]), range(xlist.shape[0]))
-        c = ax.contour(X, Y, z, contournum, colors=contourcolor,
-                       linestyles=contourstyle)
-        plt.clabel(c, inline=True, fmt=contourfmt)
-
-    ax.set_yticks(np.arange(xl["start"], xl["end"], xl["step"]))
-    ax.set_yticklabels([xl["fmt"] % i for i in xlist.take(
-                range(xl["start"], xl["end"], xl["step"]))],
-               rotation=xl["angle"])
-    ax.set_ylabel(xl["name"])
-    ax.set_xticks(np.arange(yl["start"], yl["end"], yl["step"]))
-    ax.set_xticklabels([yl["fmt"] % i for i in ylist.take(
-                range(yl["start"], yl["end"], yl["step"]))],
-               rotation=yl["angle"])
-    ax.set_xlabel(yl["name"])
+        with Phase("contour"):
+            X, Y = np.meshgrid(range(ylist.shape[0]), range(xlist.shape[0]))
+            c = ax.contour(X, Y, z, contournum, colors=contourcolor,
+                           linestyles=contourstyle)
+            ax.clabel(c, inline=True, fmt=contourfmt)
+
+    with Phase("ticks"):
+        ax.set_yticks(np.arange(xl["start"], xl["end"], xl["step"]))
+        ax.set_yticklabels([xl["fmt"] % i for i in xlist.take(
+                    range(xl["start"], xl["end"], xl["step"]))],
+                   rotation=xl["angle"])
+        ax.set_ylabel(xl["name"])
+        ax.set_xticks(np.arange(yl["start"], yl["end"], yl["step"]))
+        ax.set_xticklabels([yl["fmt"] % i for i in ylist.take(
+                    range(yl["start"], yl["end"], yl["step"]))],
+                   rotation=yl["angle"])
+        ax.set_xlabel(yl["name"])
     
     ax.tick_params(direction="out")
     return ax, cbar
 
 
-def Plot3DFix(figure, xlist: np.array, ylist: np.array, z: np.array, xl={}, yl={}, zl={}, contour=False, contournum=5, contourstyle='--', continuefmt='%.1f'):
+def _FastHeatmap(ax, z, mask, zl, backend="image"):
+    # 与 sns.heatmap 布局一致：第 i 行占 [i, i+1]，y 轴向下，无边框，被遮罩的格子透明
+    nrow, ncol = z.shape
+    data = np.ma.masked_array(z, mask=np.asarray(mask, dtype=bool))
+    if backend == "image":
+        mappable = ax.imshow(data, cmap=zl["color"], vmin=zl["min"], vmax=zl["max"],
+                             extent=(0, ncol, nrow, 0), origin="upper",
+                             interpolation="nearest", aspect="auto")
+    elif backend == "mesh":
+        mappable = ax.pcolormesh(data, cmap=zl["color"], vmin=zl["min"], vmax=zl["max"])
+    else:
+        raise ValueError("backend must be 'sns', 'image' or 'mesh', got %r" % (backend,))
+    ax.set_xlim(0, ncol)
+    ax.set_ylim(nrow, 0)
+    ax.grid(False)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    return mappable
+
+
+def _AdaptiveIndex(weight, n, floor=0.2):
+    # 按权重选取 n 条网格线（含首尾），权重大处更密；floor 为均匀分布所占比例
+    m = weight.shape[0]
+    if n >= m:
+        return np.arange(m)
+    total = weight.sum()
+    density = floor/m + (1-floor)*(weight/total if total > 0 else 1.0/m)
+    cdf = np.cumsum(density)
+    cdf /= cdf[-1]
+    idx = np.clip(np.searchsorted(cdf, np.linspace(0, 1, n)), 0, m-1)
+    return np.unique(np.concatenate([[0], idx, [m-1]]))
+
+
+def _LinearWeights(idx, m):
+    pos = np.arange(m)
+    j = np.clip(np.searchsorted(idx, pos, side="right")-1, 0, len(idx)-2)
+    t = (pos-idx[j])/(idx[j+1]-idx[j])
+    return j, t
+
+
+def DecimateGrid(z, budget, adaptive=True):
+    # 按多边形预算 budget 选取行、列下标；adaptive 时按局部曲率分配，平坦处稀疏、起伏处密集
+    R, C = z.shape
+    if (R-1)*(C-1) <= budget or R < 3 or C < 3:
+        return np.arange(R), np.arange(C)
+    nr = int(np.clip(np.sqrt(budget*(R-1)/(C-1)), 1, R-1)) + 1
+    nc = int(np.clip(budget//(nr-1), 1, C-1)) + 1
+    if not adaptive:
+        return (np.unique(np.linspace(0, R-1, nr).round().astype(int)),
+                np.unique(np.linspace(0, C-1, nc).round().astype(int)))
+    zz = np.nan_to_num(np.asarray(z, dtype=float))
+    rw = np.pad(np.abs(np.diff(zz, 2, axis=0)).mean(axis=1), 1, mode="edge")
+    cw = np.pad(np.abs(np.diff(zz, 2, axis=1)).mean(axis=0), 1, mode="edge")
+    return _AdaptiveIndex(rw, nr), _AdaptiveIndex(cw, nc)
+
+
+def GridError(z, ri, ci):
+    # 简化网格按双线性插值还原后与原数据的最大绝对误差
+    zz = np.nan_to_num(np.asarray(z, dtype=float))
+    if len(ri) < 2 or len(ci) < 2:
+        return 0.0
+    zr = zz[np.ix_(ri, ci)]
+    j, t = _LinearWeights(ci, zz.shape[1])
+    rows = zr[:, j]*(1-t) + zr[:, j+1]*t
+    i, u = _LinearWeights(ri, zz.shape[0])
+    full = rows[i]*(1-u)[:, None] + rows[i+1]*u[:, None]
+    return float(np.max(np.abs(full-zz)))
+
+
+@_Profiled
+def Plot3DFix(figure, xlist: np.array, ylist: np.array, z: np.array, xl={}, yl={}, zl={}, contour=False, contournum=5, contourstyle='--', continuefmt='%.1f', budget=None, adaptive=True, tol=None):
+    # budget：曲面多边形数上限，None 时逐格绘制；adaptive：按曲率自适应选取网格线，否则均匀抽取
+    # tol：允许的最大插值误差，给定时从 budget（默认 10000）起倍增直到满足
     # 参数字典初始化
     xl, yl, zl = initDict(xlist, ylist, z, xl, yl, zl)
-    ax = Axes3D(figure)
+    ax = figure.add_subplot(111, projection=Axes3D.name)
     X, Y = np.meshgrid(ylist, xlist)
-    surf = ax.plot_surface(
-        X, Y, z, cmap=zl["color"], lw=3, rstride=1, cstride=1, vmax=zl["max"], vmin=zl["min"], alpha=zl["a"])
+    if budget is not None or tol is not None:
+        with Phase("decimate"):
+            budget = 10000 if budget is None else budget
+            while True:
+                ri, ci = DecimateGrid(z, budget, adaptive)
+                full = len(ri) == z.shape[0] and len(ci) == z.shape[1]
+                if tol is None or full or GridError(z, ri, ci) <= tol:
+                    break
+                budget *= 2
+            grid = np.ix_(ri, ci)
+            X, Y, z = X[grid], Y[grid], np.asarray(z)[grid]
+    with Phase("surface"):
+        surf = ax.plot_surface(
+            X, Y, z, cmap=zl["color"], lw=3, rstride=1, cstride=1, vmax=zl["max"], vmin=zl["min"], alpha=zl["a"])
 
     if contour:
         # ax.contour(X, Y, z, contournum, colors="k", zdir ='z',
         #                 linestyles=contourstyle)
-        c = ax.contour(X, Y, z, contournum, cmap=zl["color"],
-                       linestyles=contourstyle, offset=zl["min"])
-        plt.clabel(c, inline=True, fmt=continuefmt)
+        with Phase("contour"):
+            c = ax.contour(X, Y, z, contournum, cmap=zl["color"],
+                           linestyles=contourstyle, offset=zl["min"])
+            ax.clabel(c, inline=True, fmt=continuefmt)
     ax.set_zlim(zl["min"], zl["max"])
     ax.view_init(elev=zl["vx"], azim=zl["vz"])
-    figure.colorbar(surf, shrink=0.7, aspect=20)
+    with Phase("colorbar"):
+        figure.colorbar(surf, shrink=0.7, aspect=20)
     ax.set_xlabel(xl["name"])
     ax.set_ylabel(yl["name"])
     ax.set_zlabel(zl["name"])
     return figure, ax
 
 
-def spline(x_arr,y_arr,step=1000,order=3,delete=1,turn=False,c="gray",label=""):
-    # 样条差值拟合
+@_Profiled
+def spline(x_arr,y_arr,step=1000,order=3,delete=1,turn=False,c="gray",label="",ax=None,mode="exact"):
+    # 样条差值拟合；ax 默认为当前子图
+    # mode="large"：分箱后最小二乘拟合（见 spline_large），适合百万点以上的单条序列
+    if mode == "large":
+        return spline_large(x_arr, y_arr, step=step, order=order, delete=delete, turn=turn, c=c, label=label, ax=ax)
+    if mode != "exact":
+        raise ValueError("mode must be 'exact' or 'large', got %r" % (mode,))
     if turn:
         tmp = x_arr
         x_arr = y_arr
         y_arr = tmp
     x_arr = np.array(x_arr)
     y_arr = np.array(y_arr)
-    x_arr = x_arr.take(range(1, x_arr.shape[0], delete))
-    y_arr = y_arr.take(range(1, y_arr.shape[0], delete))
+    # 每隔 delete 个点取一个，保留首点
+    x_arr = x_arr[::delete]
+    y_arr = y_arr[::delete]
     tk = splrep(x_arr, y_arr, k=order) # Returns the knots and coefficents
 
     ### Evaluate the spline using the knots and coefficents on the domian x
     x = np.linspace(np.min(x_arr),np.max(x_arr) , step) # new x-grid
     y = splev(x, tk, der=0)
     ### Plot
+    ax = plt.gca() if ax is None else ax
     if turn:
-        plt.plot(y,x,color=c,label=label)
+        ax.plot(y,x,color=c,label=label)
     else:
-        plt.plot(x,y,color=c,label=label)
+        ax.plot(x,y,color=c,label=label)
 
 
-def polyfit(x_arr,y_arr,step=1000,order=3,delete=1,turn=False,c="gray",label="",ax=plt,x=np.array([]),NeedPlot=True):
-    # 多项式拟合
+@_Profiled
+def polyfit(x_arr,y_arr,step=1000,order=3,delete=1,turn=False,c="gray",label="",ax=None,x=np.array([]),NeedPlot=True):
+    # 多项式拟合；ax 默认为当前子图
     if turn:
         tmp = x_arr
         x_arr = y_arr
@@ -304,12 +1314,475 @@ def polyfit(x_arr,y_arr,step=1000,order=3,delete=1,turn=False,c="gray",label="",
     p1 = np.poly1d(z1)
     y = p1(x)
     if NeedPlot:
+        ax = plt.gca() if ax is None else ax
         if turn:
             ax.plot(y,x,color=c,label=label)
         else:
             ax.plot(x,y,color=c,label=label)
     return p1
 
+
+# 大数据样条：先按 x 等宽分箱（分块累加，内存与输入规模线性相关），再用有限个节点做加权最小二乘拟合
+SPLINE_BINS = 8192
+SPLINE_KNOTS = 256
+
+
+def BinSeries(x_arr, y_arr, bins=SPLINE_BINS, chunk=None):
+    # 按 x 等宽分箱，返回非空箱的 (x 均值, y 均值, 点数, 箱内合并标准差)；输入无需有序，可为 memmap
+    chunk = CHUNK_SIZE if chunk is None else chunk
+    x_arr = np.asarray(x_arr).ravel()
+    y_arr = np.asarray(y_arr).ravel()
+    if x_arr.shape != y_arr.shape:
+        raise ValueError("x_arr and y_arr must have the same length, got %d and %d" % (x_arr.size, y_arr.size))
+    if x_arr.size == 0:
+        raise ValueError("cannot bin an empty series")
+    lo, hi = np.inf, -np.inf
+    for i in range(0, x_arr.size, chunk):
+        xc = x_arr[i:i+chunk]
+        lo, hi = min(lo, float(xc.min())), max(hi, float(xc.max()))
+    bins = max(1, int(bins))
+    scale = bins/(hi-lo) if hi > lo else 0.0
+    # 逐块累加各箱点数、x 偏移和、y 均值与离差平方和（按块合并，数据有大偏置时方差仍准确）
+    count, sx, mean, m2 = np.zeros(bins), np.zeros(bins), np.zeros(bins), np.zeros(bins)
+    for i in range(0, x_arr.size, chunk):
+        xc = np.asarray(x_arr[i:i+chunk], dtype=float) - lo
+        yc = np.asarray(y_arr[i:i+chunk], dtype=float)
+        idx = np.minimum((xc*scale).astype(np.intp), bins-1)
+        nc = np.bincount(idx, minlength=bins).astype(float)
+        hit = nc > 0
+        mc = np.zeros(bins)
+        mc[hit] = np.bincount(idx, yc, minlength=bins)[hit]/nc[hit]
+        m2c = np.bincount(idx, (yc-mc[idx])**2, minlength=bins)
+        total = count+nc
+        delta = mc-mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frac = np.where(hit, nc/total, 0.0)
+        mean += delta*frac
+        m2 += m2c + delta*delta*count*frac
+        count = total
+        sx += np.bincount(idx, xc, minlength=bins)
+    keep = count > 0
+    count, sx, yb, m2 = count[keep], sx[keep], mean[keep], m2[keep]
+    xb = sx/count + lo
+    # 箱内方差合并为整体噪声估计
+    dof = count.sum()-count.size
+    sigma = np.sqrt(float(m2.sum())/dof) if dof > 0 else 0.0
+    return xb, yb, count, sigma
+
+
+def _SplineKnots(xb, order, knots):
+    # 内部节点取在等间隔的非空箱序号上，保证每个节点区间内有足够的箱（满足 Schoenberg-Whitney 条件）
+    n = xb.size
+    if knots is None:
+        knots = min(SPLINE_KNOTS, n//8)
+    knots = max(0, min(int(knots), n-order-1))
+    inner = xb[np.linspace(0, n-1, knots+2).round().astype(int)[1:-1]]
+    inner = np.unique(inner)
+    inner = inner[(inner > xb[0]) & (inner < xb[-1])]
+    return np.concatenate([[xb[0]]*(order+1), inner, [xb[-1]]*(order+1)])
+
+
+@_Profiled
+def spline_large(x_arr, y_arr, step=1000, order=3, delete=1, knots=None, bins=SPLINE_BINS, smooth=None,
+                 x=None, chunk=None, turn=False, c="gray", label="", ax=None, NeedPlot=True):
+    # 大数据样条拟合：分箱 -> 有限节点的加权最小二乘样条（smooth 不为 None 时为平滑样条）-> 分块求值
+    # knots：内部节点数，默认按箱数自动选取且不超过 SPLINE_KNOTS；smooth：平滑系数，1 对应按噪声估计的期望残差
+    # 给定的 x 超出数据范围时两种拟合均按端点多项式外推（同 spline）；返回 (x, y, BSpline)
+    chunk = CHUNK_SIZE if chunk is None else chunk
+    if turn:
+        x_arr, y_arr = y_arr, x_arr
+    x_arr = np.asarray(x_arr)[::delete]
+    y_arr = np.asarray(y_arr)[::delete]
+    with Phase("bin"):
+        xb, yb, count, sigma = BinSeries(x_arr, y_arr, bins, chunk)
+        _Note("bins", int(xb.size))
+    if xb.size <= order:
+        raise ValueError("need at least %d distinct bins for order %d, got %d" % (order+1, order, xb.size))
+    w = np.sqrt(count)/(sigma if sigma > 0 else 1.0)
+    with Phase("fit"):
+        if smooth is None:
+            t = _SplineKnots(xb, order, knots)
+            bspl = spi.make_lsq_spline(xb, yb, t, k=order, w=w)
+        else:
+            # 平滑样条由 FITPACK 自动加节点，节点数不超过箱数
+            t, coef, k = splrep(xb, yb, w=w, k=order, s=smooth*xb.size)
+            bspl = spi.BSpline(t, coef, k)
+        _Note("knots", int(bspl.t.size))
+    with Phase("evaluate"):
+        if x is None:
+            x = np.linspace(xb[0], xb[-1], step)
+        x = np.asarray(x, dtype=float)
+        y = np.empty_like(x)
+        for i in range(0, x.size, chunk):
+            y[i:i+chunk] = bspl(x[i:i+chunk])
+    if NeedPlot:
+        ax = plt.gca() if ax is None else ax
+        if turn:
+            ax.plot(y,x,color=c,label=label)
+        else:
+            ax.plot(x,y,color=c,label=label)
+    return x, y, bspl
+
+
+def _BatchInput(x_arr, y_arr, delete):
+    # 批量拟合输入：x 为共享的一维网格，y 为 (序列数, 点数) 的二维数组
+    x_arr = np.asarray(x_arr, dtype=float)[::delete]
+    y_arr = np.atleast_2d(np.asarray(y_arr, dtype=float))[:, ::delete]
+    if y_arr.shape[1] != x_arr.shape[0]:
+        raise ValueError("y_arr must have shape (n_series, %d), got %r" % (x_arr.shape[0], y_arr.shape))
+    return x_arr, y_arr
+
+
+@_Profiled
+def polyfit_batch(x_arr, y_arr, step=1000, order=3, delete=1, x=None):
+    # 批量多项式拟合：所有序列共用一次最小二乘求解，不绘图
+    # 返回 (x, curves, coeffs)，curves 为 (序列数, len(x))，coeffs 为 (序列数, order+1)，高次在前
+    x_arr, y_arr = _BatchInput(x_arr, y_arr, delete)
+    if x is None:
+        x = np.linspace(np.min(x_arr), np.max(x_arr), step)
+    coeffs = np.polyfit(x_arr, y_arr.T, order).T
+    curves = coeffs @ np.vander(np.asarray(x, dtype=float), order+1).T
+    return x, curves, coeffs
+
+
+@_Profiled
+def spline_batch(x_arr, y_arr, step=1000, order=3, delete=1, x=None):
+    # 批量样条插值：所有序列共用同一组节点与基函数，一次求解与求值，不绘图
+    # 返回 (x, curves, (t, c, k))，c 为 (系数数, 序列数)
+    x_arr, y_arr = _BatchInput(x_arr, y_arr, delete)
+    order_idx = np.argsort(x_arr, kind="stable")
+    x_arr, y_arr = x_arr[order_idx], y_arr[:, order_idx]
+    if x is None:
+        x = np.linspace(x_arr[0], x_arr[-1], step)
+    bspl = spi.make_interp_spline(x_arr, y_arr.T, k=order, axis=0)
+    curves = bspl(x).T
+    return x, curves, (bspl.t, bspl.c, bspl.k)
+
+
+def PlotCurves(x, curves, ax=None, colors="gray", turn=False, cmap=None, **kwargs):
+    # 用单个 LineCollection 绘制批量拟合结果；colors 为单个颜色或颜色列表，cmap 给定时按序列渐变取色
+    # colors 为非颜色名的 cmap 名称（如 "viridis"）时同 cmap
+    import matplotlib.colors as mcolors
+    ax = plt.gca() if ax is None else ax
+    curves = np.atleast_2d(curves)
+    xs = np.broadcast_to(np.asarray(x, dtype=float), curves.shape)
+    segments = np.stack([curves, xs] if turn else [xs, curves], axis=-1)
+    if cmap is None and isinstance(colors, str) and not mcolors.is_color_like(colors) and colors in plt.colormaps():
+        cmap = colors
+    if cmap is not None:
+        colors = plt.get_cmap(cmap)(np.linspace(0, 1, curves.shape[0]))
+    lc = LineCollection(segments, colors=colors, **kwargs)
+    ax.add_collection(lc)
+    ax.autoscale_view()
+    return lc
+
+
+def _SegmentFirst(y, target, starts, counts):
+    # 各段内首个等于 target 的下标（找不到时取段首）
+    seg = np.repeat(np.arange(starts.size), counts)
+    hits = np.flatnonzero(y == target[seg])
+    if hits.size == 0:
+        return starts
+    idx = hits[np.minimum(np.searchsorted(hits, starts), hits.size-1)]
+    return np.where((idx >= starts) & (idx < starts+counts), idx, starts)
+
+
+def DecimateMinMax(x, y, n, xlim=None, sorted=None):
+    # 按像素列分箱，每箱保留最小、最大值两点（保持原顺序），尖峰不会丢失；n 为输出点数上限
+    # x 有序时按 x 等分像素列（xlim 默认为数据范围），x 不均匀时同样每列约两点；无序时按点数等分
+    N = len(y)
+    bins = max(1, n//2)
+    if N <= 2*bins:
+        return x, y
+    if sorted is None:
+        sorted = bool(np.all(np.diff(x) >= 0))
+    if sorted:
+        lo, hi = (x[0], x[-1]) if xlim is None else (min(xlim), max(xlim))
+        edges = np.linspace(lo, hi, bins+1)[1:-1]
+        starts = np.unique(np.concatenate([[0], np.searchsorted(x, edges, side="left")]))
+        starts = starts[starts < N]
+    else:
+        starts = np.arange(0, N, -(-N // bins))
+    counts = np.diff(np.append(starts, N))
+    # fmin/fmax 忽略 NaN
+    imin = _SegmentFirst(y, np.fmin.reduceat(y, starts), starts, counts)
+    imax = _SegmentFirst(y, np.fmax.reduceat(y, starts), starts, counts)
+    idx = np.sort(np.stack([imin, imax], axis=1), axis=1).ravel()
+    idx = np.concatenate([[0], idx, [N-1]])
+    return x[idx], y[idx]
+
+
+def DecimateLTTB(x, y, n):
+    # Largest-Triangle-Three-Buckets 降采样，保留视觉形状；n 为输出点数
+    N = len(y)
+    if n >= N or n < 3:
+        return x, y
+    edges = np.linspace(1, N-1, n-1).astype(int)
+    out = np.empty(n, dtype=int)
+    out[0], out[-1] = 0, N-1
+    a = 0
+    for i in range(n-2):
+        s, e = edges[i], edges[i+1]
+        ne = edges[i+2] if i+2 < n-1 else N
+        avx, avy = np.mean(x[e:ne]), np.mean(y[e:ne])
+        area = np.abs((x[a]-avx)*(y[s:e]-y[a]) - (x[a]-x[s:e])*(avy-y[a]))
+        a = s + int(np.argmax(area))
+        out[i+1] = a
+    return x[out], y[out]
+
+
+class DecimatedLine(object):
+    # 按输出像素降采样的折线：坐标范围变化时只对可见部分重新降采样，放大后显示完整细节
+    def __init__(self, ax, x, y, method="minmax", dpi=None, **kwargs):
+        self.ax = ax
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        if method not in ("minmax", "lttb"):
+            raise ValueError("method must be 'minmax' or 'lttb', got %r" % (method,))
+        self.method = method
+        self.dpi = dpi
+        self.sorted = bool(np.all(np.diff(self.x) >= 0))
+        self.line, = ax.plot([], [], **kwargs)
+        finite = np.isfinite(self.y)
+        if finite.any():
+            ax.update_datalim([[np.min(self.x), np.min(self.y[finite])],
+                               [np.max(self.x), np.max(self.y[finite])]])
+            ax.autoscale_view()
+        self._cid = ax.callbacks.connect("xlim_changed", self.Update)
+        self.Update()
+
+    def Update(self, ax=None):
+        x, y = self.x, self.y
+        if self.sorted:
+            xmin, xmax = self.ax.get_xlim()
+            left = max(0, np.searchsorted(x, min(xmin, xmax), side="left")-1)
+            right = np.searchsorted(x, max(xmin, xmax), side="right")+1
+            x, y = x[left:right], y[left:right]
+        n = 2*AxesPixels(self.ax, self.dpi)[1]
+        if self.method == "minmax":
+            xlim = self.ax.get_xlim() if self.sorted else None
+            self.line.set_data(*DecimateMinMax(x, y, n, xlim, self.sorted))
+        else:
+            self.line.set_data(*DecimateLTTB(x, y, n))
+
+    def Disconnect(self):
+        self.ax.callbacks.disconnect(self._cid)
+
+
+@_Profiled
+def PlotDecimated(x, y, ax=None, method="minmax", dpi=None, **kwargs):
+    # 绘制超长序列：method 为 minmax（每像素列保留最值）或 lttb；dpi 默认为 DPI_SAVE
+    ax = plt.gca() if ax is None else ax
+    return DecimatedLine(ax, x, y, method, dpi, **kwargs)
+
+
+# 大数据面板：分块流式统计的单块元素数及分位数抽样总数
+CHUNK_SIZE = 2**22
+SAMPLE_SIZE = 10**6
+
+
+def LoadPanel(item):
+    # 读取面板数据：支持数组、np.memmap、.npy 路径（以内存映射方式打开）或返回上述对象的函数
+    if callable(item):
+        item = item()
+    if isinstance(item, (str, os.PathLike)):
+        item = np.load(item, mmap_mode="r")
+    return item
+
+
+def _OutOfCore(item):
+    # 面板是否不常驻内存：.npy 路径、np.memmap 或按需加载的函数
+    return isinstance(item, (str, os.PathLike, np.memmap)) or callable(item)
+
+
+def _IterChunks(arr, chunk=CHUNK_SIZE):
+    # 按行分块遍历，每块约 chunk 个元素，memmap 只会读入当前块
+    if arr.ndim == 0 or arr.shape[0] == 0:
+        yield np.asarray(arr).ravel()
+        return
+    rows = max(1, chunk // max(1, arr[0].size))
+    for start in range(0, arr.shape[0], rows):
+        yield np.asarray(arr[start:start+rows])
+
+
+def StreamLimits(data, percentile=None, chunk=CHUNK_SIZE, sample=SAMPLE_SIZE):
+    # 对全部面板做一次分块流式统计，返回 (vmin, vmax)
+    # percentile=(low, high) 时按等间隔抽样估计分位数并截断
+    vmin, vmax = np.inf, -np.inf
+    samples = []
+    keys = list(data.keys())
+    for key in keys:
+        arr = LoadPanel(data[key])
+        step = max(1, arr.size * len(keys) // sample)
+        for block in _IterChunks(arr, chunk):
+            if block.size == 0:
+                continue
+            vmin = min(vmin, np.min(block))
+            vmax = max(vmax, np.max(block))
+            if percentile is not None:
+                samples.append(block.ravel()[::step].copy())
+        del arr
+    if percentile is not None and samples:
+        low, high = np.percentile(np.concatenate(samples), percentile)
+        vmin, vmax = max(vmin, low), min(vmax, high)
+    return vmin, vmax
+
+
+def BlockReduce(arr, fy, fx, method="mean", chunk=CHUNK_SIZE):
+    # 向量化块池化：每 fy×fx 个像素合并为一个（边缘不足的块按实际大小统计），按行分块读入
+    ufunc = {"mean": np.add, "max": np.maximum, "min": np.minimum}[method]
+    h, w = arr.shape[:2]
+    rows = np.arange(0, h, fy)
+    cols = np.arange(0, w, fx)
+    step = max(1, chunk // max(1, arr[0].size) // fy) * fy
+    out = []
+    for start in range(0, h, step):
+        block = np.asarray(arr[start:start+step])
+        if method == "mean" and not np.issubdtype(block.dtype, np.floating):
+            block = block.astype(np.float64)
+        block = ufunc.reduceat(block, np.arange(0, block.shape[0], fy), axis=0)
+        out.append(ufunc.reduceat(block, cols, axis=1))
+    out = np.concatenate(out)
+    if method == "mean":
+        counts = np.outer(np.diff(np.append(rows, h)), np.diff(np.append(cols, w)))
+        # 保持浮点输入的精度类型（float32 面板不会放大为 float64）
+        out = (out / counts.reshape(counts.shape + (1,)*(out.ndim-2))).astype(out.dtype, copy=False)
+    return out
+
+
+class Pyramid(object):
+    # 多分辨率金字塔：第 k 层为原始数据 2^k 倍池化，按需构建并缓存（不持有原始数据）
+    def __init__(self, shape, method="mean"):
+        self.shape = tuple(shape)
+        self.method = method
+        self.levels = {}
+        self.cached = False
+
+    def LevelShape(self, k):
+        return tuple(-(-n // 2**k) for n in self.shape[:2])
+
+    def Level(self, k, source):
+        # source 同 LoadPanel，仅在需要从原始分辨率构建时读取
+        if k == 0:
+            return LoadPanel(source)
+        if k not in self.levels:
+            finer = max([j for j in self.levels if j < k] + [0])
+            base = self.levels[finer] if finer else LoadPanel(source)
+            f = 2**(k-finer)
+            level = self.levels[k] = BlockReduce(base, f, f, self.method)
+            if self.cached:
+                # 新层级计入缓存容量
+                _TrimPyramids()
+            return level
+        return self.levels[k]
+
+    def ForPixels(self, ny, nx, source):
+        # 取不低于目标像素数的最粗层级
+        k = 0
+        while True:
+            h, w = self.LevelShape(k+1)
+            if h < ny or w < nx or (h, w) == self.LevelShape(k):
+                break
+            k += 1
+        return self.Level(k, source)
+
+
+# 金字塔缓存：按内容键（见 PanelKey）索引，按总字节数 LRU 淘汰
+PYRAMID_CACHE_BYTES = 2**28
+_PYRAMID_CACHE = OrderedDict()
+_PYRAMID_LOCK = threading.RLock()
+
+
+def PanelKey(item, chunk=CHUNK_SIZE):
+    # 面板的缓存键：.npy 路径与带文件名的 memmap 用 (路径, 修改时间, 大小)，其余按形状、类型与内容摘要
+    # 原地修改数组后键随之改变，不会取到旧的层级；memmap 的修改需 flush 后才会体现在修改时间上
+    if isinstance(item, (str, os.PathLike)):
+        path = os.path.abspath(item)
+        stat = os.stat(path)
+        return ("file", path, stat.st_mtime_ns, stat.st_size)
+    arr = LoadPanel(item)
+    if isinstance(arr, np.memmap) and getattr(arr, "filename", None):
+        stat = os.stat(arr.filename)
+        return ("memmap", arr.filename, stat.st_mtime_ns, arr.offset, arr.shape, arr.dtype.str)
+    arr = np.asarray(arr)
+    digest = hashlib.blake2b(digest_size=16)
+    for block in _IterChunks(arr, chunk):
+        digest.update(np.ascontiguousarray(block).view(np.uint8))
+    return ("array", arr.shape, arr.dtype.str, digest.hexdigest())
+
+
+def _PyramidBytes(pyramid):
+    return sum(level.nbytes for level in pyramid.levels.values())
+
+
+def _TrimPyramids():
+    # 超出 PYRAMID_CACHE_BYTES 时从最久未用的金字塔开始淘汰（至少保留最近使用的一个）
+    with _PYRAMID_LOCK:
+        total = sum(_PyramidBytes(p) for p in _PYRAMID_CACHE.values())
+        while total > PYRAMID_CACHE_BYTES and len(_PYRAMID_CACHE) > 1:
+            _, pyramid = _PYRAMID_CACHE.popitem(last=False)
+            total -= _PyramidBytes(pyramid)
+
+
+def GetPyramid(item, method="mean", key=None):
+    # 取缓存的金字塔，以不同尺寸重绘时复用已构建的层级；item 同 LoadPanel
+    # key：调用方给定的缓存键（数据变化时需更换），省去计算内容摘要
+    key = (PanelKey(item) if key is None else ("user", key), method)
+    with _PYRAMID_LOCK:
+        pyramid = _PYRAMID_CACHE.get(key)
+        if pyramid is not None:
+            _PYRAMID_CACHE.move_to_end(key)
+            return pyramid
+        pyramid = Pyramid(LoadPanel(item).shape, method)
+        pyramid.cached = True
+        _PYRAMID_CACHE[key] = pyramid
+        _TrimPyramids()
+    return pyramid
+
+
+def ClearPyramids():
+    with _PYRAMID_LOCK:
+        _PYRAMID_CACHE.clear()
+
+
+def _PanelSource(item):
+    # 加载函数只调用一次，结果供缓存键、金字塔与取层级共用；.npy 路径保留为路径（按文件缓存，打开内存映射开销很小）
+    if isinstance(item, (str, os.PathLike)):
+        return item
+    return LoadPanel(item)
+
+
+def ReduceToPixels(item, ny, nx, method="mean", key=None):
+    # 将数据降采样到约 ny×nx 像素（不低于该值），用于 imshow 前预处理；key 同 GetPyramid
+    source = _PanelSource(item)
+    return GetPyramid(source, method, key).ForPixels(ny, nx, source)
+
+
+def _PanelImage(item, ax, lod, dpi=None):
+    # 面板交给 imshow 的数据与范围：lod 同 DrawMaps 的 prop["lod"]，"auto" 时仅池化不常驻内存的面板（不缓存）
+    # 每次调用只加载一次面板
+    method = ("mean" if _OutOfCore(item) else False) if lod == "auto" else lod
+    source = _PanelSource(item)
+    if not method:
+        return LoadPanel(source), None
+    ny, nx = AxesPixels(ax, dpi)
+    if lod == "auto":
+        pyramid = Pyramid(LoadPanel(source).shape, method)
+    else:
+        pyramid = GetPyramid(source, method)
+    h, w = pyramid.shape[:2]
+    return pyramid.ForPixels(ny, nx, source), (-0.5, w-0.5, -0.5, h-0.5)
+
+
+def AxesPixels(ax, dpi=None):
+    # 子图在输出图片中占据的像素数 (ny, nx)
+    fig = ax.figure
+    dpi = DPI_SAVE if dpi is None else dpi
+    bbox = ax.get_position()
+    return (int(np.ceil(bbox.height*fig.get_figheight()*dpi)),
+            int(np.ceil(bbox.width*fig.get_figwidth()*dpi)))
+
+
 def Initprop_forDrawMaps(prop, data):
     # 图片尺寸参数
     prop.setdefault("xl", 2.5)
@@ -323,11 +1796,20 @@ def Initprop_forDrawMaps(prop, data):
     # 绘图参数-cbar
     prop.setdefault("c_labels", 'Cbar')
     prop.setdefault("cbar_str", 'seismic')
-    prop.setdefault("vmin", np.min(data[(0,0)]))
-    prop.setdefault("vmax", np.max(data[(0,0)]))
+    prop.setdefault("percentile", None)
+    if "vmin" not in prop or "vmax" not in prop:
+        # 颜色范围取全部面板的统一范围（一次流式统计）
+        vmin, vmax = StreamLimits(data, prop["percentile"])
+        prop.setdefault("vmin", vmin)
+        prop.setdefault("vmax", vmax)
     prop.setdefault("vs", 6)
     prop.setdefault("v_fmt", "%.2f")
 
+    # 多分辨率：lod 为 "mean"/"max" 时按输出像素预先池化（金字塔缓存），lod_dpi 默认为 DPI_SAVE
+    # "auto" 时仅对路径、memmap 与函数面板按 mean 池化（不缓存），绘图只保留降采样后的数据；False 关闭
+    prop.setdefault("lod", "auto")
+    prop.setdefault("lod_dpi", DPI_SAVE)
+
     # 刻度参数
     prop.setdefault("x0_ticks", [])
     prop.setdefault("x0_tlabels", [])
@@ -351,22 +1833,30 @@ def Initprop_forDrawMaps(prop, data):
 
 
 
-def DrawMaps(xlist, ylist, data, prop = {}):
+@_Profiled
+def DrawMaps(xlist, ylist, data, prop = {}, fig=None):
+    # fig：在给定的图片上绘制（例如 NewFigure 创建的图片），默认新建 pyplot 图片
     x = len(xlist)
     y = len(ylist)
-    prop = Initprop_forDrawMaps(prop, data)
+    with Phase("limits"):
+        prop = Initprop_forDrawMaps(prop, data)
 
-    fig = plt.figure(figsize=(prop["yl"]*y, prop["xl"]*x))
+    if fig is None:
+        fig = _NewFigure((prop["yl"]*y, prop["xl"]*x))
+    else:
+        fig.set_size_inches(prop["yl"]*y, prop["xl"]*x)
     fig.subplots_adjust(hspace=prop["space"][0], wspace=prop["space"][1])
     width_ratios = [1] * y
     width_ratios.append(prop["cbar_weight"])
-    gs = gridspec.GridSpec(x, y+1, width_ratios=width_ratios)
+    gs = gridspec.GridSpec(x, y+1, width_ratios=width_ratios, figure=fig)
     for xv, xi in enumerate(xlist):
         for yv, yi in enumerate(ylist):
-            ax = plt.subplot(gs[xi,yi])
-            tmpdata = data[(xi,yi)]
-
-            im = ax.imshow(tmpdata, cmap=prop["cbar_str"], origin='lower', vmin=prop["vmin"], vmax=prop["vmax"], aspect=prop["aspect"])
+            ax = fig.add_subplot(gs[xi,yi])
+            # 逐个面板加载；imshow 会保留一份数据，不常驻内存的面板先降到输出像素再交给图像
+            with Phase("panels"):
+                tmpdata, extent = _PanelImage(data[(xi,yi)], ax, prop["lod"], prop["lod_dpi"])
+                im = ax.imshow(tmpdata, cmap=prop["cbar_str"], origin='lower', vmin=prop["vmin"], vmax=prop["vmax"], aspect=prop["aspect"], extent=extent)
+                del tmpdata
 
             if xi == x-1:
                 ax.set_xticks(prop["x0_ticks"])
@@ -399,16 +1889,380 @@ def DrawMaps(xlist, ylist, data, prop = {}):
                     ax.set_ylabel(prop["y_labels"])
 
     fig.align_ylabels()
-    ax = plt.subplot(gs[:,-1])
-    cbar = fig.colorbar(im, cax=ax)
-    cbar.set_ticks(np.linspace(prop["vmin"], prop["vmax"], prop["vs"]))
-    cbar.set_ticklabels([prop["v_fmt"]%i for i in np.linspace(prop["vmin"], prop["vmax"], prop["vs"])])
-    cbar.set_label(prop["c_labels"])
-
-
+    ax = fig.add_subplot(gs[:,-1])
+    with Phase("colorbar"):
+        cbar = fig.colorbar(im, cax=ax)
+        cbar.set_ticks(np.linspace(prop["vmin"], prop["vmax"], prop["vs"]))
+        cbar.set_ticklabels([prop["v_fmt"]%i for i in np.linspace(prop["vmin"], prop["vmax"], prop["vs"])])
+        cbar.set_label(prop["c_labels"])
+
+
+
+# 帧动画：布局（坐标、刻度、颜色条）只构建一次，逐帧原地更新图像数据，颜色范围对全部帧固定
+class FieldAnimation(object):
+    # frames：帧序列，snsFix 时每帧为二维数组（或 .npy 路径、加载函数，见 LoadPanel），DrawMaps 时每帧为面板字典
+    # kwargs 传给 snsFix（xl/yl/zl/normalZero/mask/cbar）或作为 DrawMaps 的 prop；等高线无法原地更新，不支持
+    def __init__(self, frames, kind="snsFix", xlist=None, ylist=None, figsize=(6, 4), **kwargs):
+        self.frames = list(frames)
+        self.kind = kind
+        self.xlist = xlist
+        self.ylist = ylist
+        self.figsize = figsize
+        self.kwargs = _AnimationLimits(self.frames, kind, kwargs)
+        if kind == "snsFix":
+            self._BuildHeatmap()
+        else:
+            self._BuildMaps()
+
+    def _BuildHeatmap(self):
+        zl = self.kwargs["zl"]
+        self.fig = _NewFigure(self.figsize)
+        z0 = np.asarray(LoadPanel(self.frames[0]))
+        ax, _ = snsFix(self.xlist, self.ylist, z0, xl=dict(self.kwargs.get("xl", {})),
+                       yl=dict(self.kwargs.get("yl", {})), zl=dict(zl),
+                       normalZero=self.kwargs.get("normalZero", True),
+                       cbar=self.kwargs.get("cbar", True),
+                       mask=self.kwargs.get("mask", np.array([])), backend="image")
+        self.images = [ax.images[-1]]
+        self.mask = self.images[0].get_array().mask
+
+    def _BuildMaps(self):
+        prop = dict(self.kwargs)
+        DrawMaps(self.xlist, self.ylist, self.frames[0], prop)
+        self.fig = plt.gcf()
+        self.prop = prop
+        self.keys = [(xi, yi) for xi in self.xlist for yi in self.ylist]
+        self.images = [ax.images[0] for ax in self.fig.axes[:len(self.keys)]]
+
+    def Update(self, i):
+        # 将第 i 帧数据写入已有图像，返回被更新的图元
+        frame = self.frames[i]
+        if self.kind == "snsFix":
+            z = np.asarray(LoadPanel(frame))
+            if self.kwargs.get("normalZero", True):
+                z = z[::-1, :]
+            self.images[0].set_data(np.ma.masked_array(z, mask=self.mask))
+        else:
+            for key, image in zip(self.keys, self.images):
+                # 与 DrawMaps 相同的逐面板降采样规则（含 lod="auto"）
+                data, _ = _PanelImage(frame[key], image.axes, self.prop["lod"], self.prop["lod_dpi"])
+                image.set_data(data)
+        return self.images
+
+    def Frames(self, path, dpi=100, indices=None):
+        # 逐帧保存为编号图片，path 含格式化占位符，如 "frames/f%04d.png"
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+        for i in (range(len(self.frames)) if indices is None else indices):
+            self.Update(i)
+            self.fig.savefig(path % i, dpi=dpi)
+
+    def Save(self, path, fps=10, dpi=100, workers=1):
+        # 输出 GIF（.gif）、视频（.mp4 等，需 ffmpeg）或编号图片（path 含 %），workers>1 时分块并行渲染
+        if workers > 1:
+            return self._SaveParallel(path, fps, dpi, workers)
+        if "%" in path:
+            return self.Frames(path, dpi)
+        from matplotlib import animation
+        if path.lower().endswith(".gif"):
+            writer = animation.PillowWriter(fps=fps)
+        else:
+            writer = animation.FFMpegWriter(fps=fps)
+        with writer.saving(self.fig, path, dpi):
+            for i in range(len(self.frames)):
+                self.Update(i)
+                writer.grab_frame()
+
+    def _SaveParallel(self, path, fps, dpi, workers):
+        return _SaveFramesParallel(self.frames, self.kind, self.xlist, self.ylist, self.figsize,
+                                   self.kwargs, path, fps, dpi, workers)
+
+
+def _AnimationLimits(frames, kind, kwargs):
+    # 统一颜色范围：对全部帧做一次流式统计，返回补全 zl（snsFix）或 vmin/vmax（DrawMaps）后的 kwargs 副本
+    kwargs = dict(kwargs)
+    if kind == "snsFix":
+        zl = dict(kwargs.get("zl", {}))
+        if "min" not in zl or "max" not in zl:
+            vmin, vmax = StreamLimits(dict(enumerate(frames)))
+            zl.setdefault("min", vmin)
+            zl.setdefault("max", vmax)
+        kwargs["zl"] = zl
+    elif kind == "DrawMaps":
+        if "vmin" not in kwargs or "vmax" not in kwargs:
+            panels = {(i, key): item for i, frame in enumerate(frames) for key, item in frame.items()}
+            vmin, vmax = StreamLimits(panels, kwargs.get("percentile"))
+            kwargs.setdefault("vmin", vmin)
+            kwargs.setdefault("vmax", vmax)
+    else:
+        raise ValueError("kind must be 'snsFix' or 'DrawMaps', got %r" % (kind,))
+    return kwargs
+
+
+def _SaveFramesParallel(frames, kind, xlist, ylist, figsize, kwargs, path, fps, dpi, workers):
+    # 分块并行渲染：kwargs 需已含统一的颜色范围（见 _AnimationLimits），各进程独立构建布局
+    import shutil
+    import tempfile
+    numbered = "%" in path
+    tmpdir = None if numbered else tempfile.mkdtemp()
+    pattern = path if numbered else os.path.join(tmpdir, "frame%06d.png")
+    folder = os.path.dirname(pattern)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder, exist_ok=True)
+    n = len(frames)
+    bounds = np.linspace(0, n, min(workers, n)+1).astype(int)
+    try:
+        with futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = [pool.submit(_RenderAnimationChunk, frames[a:b], a, kind,
+                                xlist, ylist, figsize, kwargs, pattern, dpi)
+                    for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+            for job in jobs:
+                job.result()
+        if numbered:
+            return
+        files = [pattern % i for i in range(n)]
+        if path.lower().endswith(".gif"):
+            first = Image.open(files[0])
+            rest = [Image.open(f) for f in files[1:]]
+            first.save(path, save_all=True, append_images=rest,
+                       duration=int(1000/fps), loop=0)
+        else:
+            import subprocess
+            subprocess.check_call([rcParams["animation.ffmpeg_path"], "-y", "-loglevel", "error",
+                                   "-framerate", str(fps), "-i", pattern,
+                                   "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+                                   "-pix_fmt", "yuv420p", path])
+    finally:
+        if tmpdir is not None:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def _RenderAnimationChunk(frames, start, kind, xlist, ylist, figsize, kwargs, pattern, dpi):
+    # 工作进程：为本块帧构建一次布局后逐帧输出，编号从 start 开始
+    plt.switch_backend("Agg")
+    anim = FieldAnimation(frames, kind, xlist, ylist, figsize, **kwargs)
+    for i in range(len(frames)):
+        anim.Update(i)
+        anim.fig.savefig(pattern % (start+i), dpi=dpi)
+    plt.close(anim.fig)
+
+
+def AnimateFrames(frames, path, kind="snsFix", xlist=None, ylist=None, fps=10, dpi=100, workers=1, figsize=(6, 4), **kwargs):
+    # 快捷接口：构建 FieldAnimation 并保存，保存后关闭图片；workers>1 时主进程只统计颜色范围，不构建图片
+    frames = list(frames)
+    if workers > 1:
+        kwargs = _AnimationLimits(frames, kind, kwargs)
+        _SaveFramesParallel(frames, kind, xlist, ylist, figsize, kwargs, path, fps, dpi, workers)
+        return
+    anim = FieldAnimation(frames, kind, xlist, ylist, figsize, **kwargs)
+    try:
+        anim.Save(path, fps, dpi, workers)
+    finally:
+        CloseFig(anim.fig)
+
+
+# 批量渲染命令行：drawwithplt manifest.json [-j 进程数] [--force] [--report report.json]
+# 清单格式：{"output_dir": "figure/", "dpi": 800, "jobs": [任务, ...]}（也可直接为任务列表），路径相对于清单所在目录
+# 任务格式：{"helper": "snsFix", "output": "a.png", "figsize": [6, 4],
+#           "inputs": {"xlist": "x.npy", "z": "z.npy"}, "args": {"xl": {...}, "contour": true}}
+# inputs 中 .npy 路径会被读入，列表转为数组，{"i,j": 路径} 转为 DrawMaps 的面板字典（绘制时逐个加载）
+CLI_HELPERS = {
+    # 名称 -> (函数, 是否需要传入 figure)
+    "snsFix": (snsFix, False),
+    "DrawMaps": (DrawMaps, False),
+    "Plot3DFix": (Plot3DFix, True),
+    "polyfit": (polyfit, False),
+    "spline": (spline, False),
+    "PlotDecimated": (PlotDecimated, False),
+}
+CLI_CACHE = ".drawwithplt_cache.json"
+_CLI_POOL = None
+
+
+def _CliWorkerInit():
+    # 工作进程预热：切换到 Agg，导入重依赖并预先加载字体缓存，并建立图片池供后续任务复用同尺寸画布
+    global _CLI_POOL
+    plt.switch_backend("Agg")
+    _CLI_POOL = FigurePool()
+    # 访问属性以触发懒加载模式下的导入
+    sns.heatmap, Axes3D.name, spi.splrep
+    fig = plt.figure()
+    fig.text(0.5, 0.5, "0")
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def _ResolveInputs(inputs, root):
+    kwargs = {}
+    for name, value in inputs.items():
+        if isinstance(value, str):
+            kwargs[name] = np.load(os.path.join(root, value))
+        elif isinstance(value, dict):
+            kwargs[name] = {tuple(int(i) for i in key.split(",")): os.path.join(root, item)
+                            for key, item in value.items()}
+        else:
+            kwargs[name] = np.asarray(value)
+    return kwargs
+
+
+def _InputFiles(inputs, root):
+    files = []
+    for value in inputs.values():
+        if isinstance(value, str):
+            files.append(os.path.join(root, value))
+        elif isinstance(value, dict):
+            files.extend(os.path.join(root, value[key]) for key in sorted(value))
+    return files
+
+
+def JobHash(job, dpi, root):
+    # 任务内容哈希：参数（规范化 JSON）加全部输入文件内容
+    h = hashlib.sha256()
+    spec = {k: job.get(k) for k in ("helper", "args", "inputs", "figsize", "output")}
+    spec["dpi"] = dpi
+    h.update(json.dumps(spec, sort_keys=True, default=str).encode())
+    for path in _InputFiles(job.get("inputs", {}), root):
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+def RenderJob(job, dpi, root, output_dir, known_hash=None, force=False):
+    # 渲染单个任务，返回结果字典（状态、哈希与分阶段耗时）
+    start = time.perf_counter()
+    output = os.path.join(output_dir, job["output"])
+    result = {"output": output, "helper": job.get("helper")}
+    # 任务中新建的图片结束后关闭；工作进程中清空后放回图片池，后续同尺寸任务复用
+    with ManagedFigures(_CLI_POOL):
+        try:
+            digest = JobHash(job, dpi, root)
+            result["hash"] = digest
+            result["hash_time"] = time.perf_counter() - start
+            if not force and digest == known_hash and os.path.exists(output):
+                result["status"] = "skipped"
+                return result
+
+            t0 = time.perf_counter()
+            func, needs_figure = CLI_HELPERS[job["helper"]]
+            kwargs = _ResolveInputs(job.get("inputs", {}), root)
+            kwargs.update(job.get("args", {}))
+            if job["helper"] != "DrawMaps":
+                fig = _NewFigure(job.get("figsize"))
+                if needs_figure:
+                    kwargs["figure"] = fig
+            func(**kwargs)
+            fig = plt.gcf()
+            fig.canvas.draw()
+            result["render_time"] = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            folder = os.path.dirname(output)
+            if folder and not os.path.isdir(folder):
+                os.makedirs(folder, exist_ok=True)
+            fig.savefig(output, bbox_inches="tight", dpi=dpi)
+            result["save_time"] = time.perf_counter() - t0
+            result["status"] = "rendered"
+        except Exception as exc:
+            result["status"] = "failed"
+            result["error"] = "%s: %s" % (type(exc).__name__, exc)
+        finally:
+            result["time"] = time.perf_counter() - start
+    return result
+
+
+def RenderManifest(manifest, workers=None, force=False):
+    # 用进程池并行渲染清单中的任务，跳过内容哈希未变且输出已存在的图片；返回结果列表
+    root = os.path.dirname(os.path.abspath(manifest))
+    with open(manifest) as f:
+        spec = json.load(f)
+    if isinstance(spec, list):
+        spec = {"jobs": spec}
+    dpi = spec.get("dpi", DPI_SAVE)
+    output_dir = os.path.join(root, spec.get("output_dir", "figure/"))
+    cache_path = os.path.join(output_dir, CLI_CACHE)
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+
+    for job in spec["jobs"]:
+        if job.get("helper") not in CLI_HELPERS:
+            raise ValueError("unknown helper %r, expected one of %s"
+                             % (job.get("helper"), sorted(CLI_HELPERS)))
+    with futures.ProcessPoolExecutor(max_workers=workers, initializer=_CliWorkerInit) as pool:
+        jobs = [pool.submit(RenderJob, job, dpi, root, output_dir,
+                            cache.get(job["output"]), force)
+                for job in spec["jobs"]]
+        results = [job.result() for job in jobs]
+
+    for job, result in zip(spec["jobs"], results):
+        if result["status"] in ("rendered", "skipped"):
+            cache[job["output"]] = result["hash"]
+        else:
+            cache.pop(job["output"], None)
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    with open(cache_path, "w") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    return results
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="drawwithplt", description="按 JSON 清单批量并行渲染图片")
+    parser.add_argument("manifest", help="任务清单 JSON 文件")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="工作进程数，默认为 CPU 核数")
+    parser.add_argument("--force", action="store_true", help="忽略缓存，全部重新渲染")
+    parser.add_argument("--report", default=None, help="将每个任务的结果与耗时写入该 JSON 文件")
+    args = parser.parse_args(argv)
+
+    plt.switch_backend("Agg")
+    start = time.perf_counter()
+    results = RenderManifest(args.manifest, args.jobs, args.force)
+    for r in results:
+        print("%-9s %8.3fs  %s%s" % (r["status"], r["time"], r["output"],
+                                    "  (%s)" % r["error"] if "error" in r else ""))
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    print("%d jobs in %.3fs: %s" % (len(results), time.perf_counter() - start,
+                                    ", ".join("%d %s" % (n, k) for k, n in sorted(counts.items()))))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(results, f, indent=1)
+    return 1 if counts.get("failed") else 0
+
+
+
+# 自定义色卡区：仅登记颜色，色图在首次使用时才构建
+RegisterPalette("CSL_4_1", ["#384259","#f73859","#7ac7c4","#f07b3f"])
+RegisterPalette("CSL_4_2", ["#2a557f","#44bd9d","#f04f75","#fdcd6e"])
+RegisterPalette("CSL_2_1", ["#b7282e","#0f1021"])
+RegisterPalette("CSMap_1", ["k","#b7282e","w"], N=1000)
+
+_CONSTANTS = {
+    "CSL_4_1": lambda: list(_PALETTES["CSL_4_1"][0]),
+    "CSL_4_2": lambda: list(_PALETTES["CSL_4_2"][0]),
+    "CSL_2_1": lambda: list(_PALETTES["CSL_2_1"][0]),
+    "CSMap_1": lambda: SetColorSelf("CSMap_1", N=1000),
+}
 
-# 自定义色卡区
-CSL_4_1 = ["#384259","#f73859","#7ac7c4","#f07b3f"]
-CSL_4_2 = ["#2a557f","#44bd9d","#f04f75","#fdcd6e"]
-CSL_2_1 = ["#b7282e","#0f1021"]
-CSMap_1 = SetColorSelf(["k","#b7282e","w"],N=1000)
\ No newline at end of file
+if LAZY:
+    def __getattr__(name):
+        # 懒加载模式下色卡在首次访问时才构建，并缓存到模块中
+        if name in _CONSTANTS:
+            value = _CONSTANTS[name]()
+            globals()[name] = value
+            return value
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+else:
+    CSL_4_1 = _CONSTANTS["CSL_4_1"]()
+    CSL_4_2 = _CONSTANTS["CSL_4_2"]()
+    CSL_2_1 = _CONSTANTS["CSL_2_1"]()
+    CSMap_1 = _CONSTANTS["CSMap_1"]()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
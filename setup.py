@@ -17,6 +17,9 @@ setup(
     license='BSD License',
     # packages=find_packages(),
     py_modules=["drawwithplt"],
+    entry_points={
+        'console_scripts': ['drawwithplt = drawwithplt:main'],
+    },
     platforms=["all"],
     url='https://github.com/liftes/PythonDraw',
     classifiers=[
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import drawwithplt as D
+
+
+def test_drawmaps_animation_update_default_lod(tmp_path):
+    # 默认 lod="auto"：内存数组按原分辨率更新，.npy 路径按输出像素池化
+    a = np.random.default_rng(0).random((400, 300))
+    b = np.random.default_rng(1).random((400, 300))
+    path = str(tmp_path / "b.npy")
+    np.save(path, b)
+    anim = D.FieldAnimation([{(0, 0): a}, {(0, 0): path}], kind="DrawMaps", xlist=[0], ylist=[0])
+    try:
+        image = anim.Update(0)[0]
+        assert np.array_equal(image.get_array(), a)
+        image = anim.Update(1)[0]
+        assert image.get_array().shape[0] <= b.shape[0]
+        assert np.isclose(image.get_array().mean(), b.mean(), atol=1e-3)
+    finally:
+        D.CloseFig(anim.fig)
+
+
+def test_snsfix_animation_update():
+    frames = [np.full((20, 30), i, dtype=float) for i in range(3)]
+    anim = D.FieldAnimation(frames, xlist=np.arange(30), ylist=np.arange(20))
+    try:
+        image = anim.Update(2)[0]
+        assert np.all(image.get_array() == 2)
+    finally:
+        D.CloseFig(anim.fig)